@@ -5,755 +5,1133 @@
 
 # --- 1. Import Necessary Libraries ---
 import os
+import sys
+from typing import TypedDict
+import base64
+import functools
+import logging
+import threading
+from urllib.parse import urlparse
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import TTLCache
 import asyncio
-import json
-from mcp.server import Server
-from mcp.server.models import InitializationOptions
-from mcp.server.lowlevel import NotificationOptions
-from mcp.server.stdio import stdio_server
-from mcp.types import ServerCapabilities, Tool, TextContent
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from ratelimit import RateLimiter, RateLimited
 
 # --- 2. Load Configuration ---
-load_dotenv()
+# The configuration below is read at import time, so .env has to be loaded
+# first. python-dotenv is optional when the variables come from the environment.
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    pass
+else:
+    load_dotenv()
 ATLASSIAN_URL = os.getenv("ATLASSIAN_URL")
 ATLASSIAN_EMAIL = os.getenv("ATLASSIAN_EMAIL")
 ATLASSIAN_TOKEN = os.getenv("ATLASSIAN_TOKEN")
 
+# stdout carries the MCP protocol, so diagnostics must go through logging
+# (configured to stderr) rather than print().
+log = logging.getLogger("atlassian_mcp")
+
+# Mock vs. live mode and the Jira URL prefixes never change after startup,
+# so resolve them once instead of on every tool call.
+MOCK_MODE = not (ATLASSIAN_URL and ATLASSIAN_EMAIL and ATLASSIAN_TOKEN)
+_CREATE_ISSUE_URL = f"{ATLASSIAN_URL}/rest/api/3/issue"
+_ISSUE_URL = _CREATE_ISSUE_URL + "/"
+_SEARCH_URL = f"{ATLASSIAN_URL}/rest/api/3/search"
+_BROWSE_URL = f"{ATLASSIAN_URL}/browse/"
+# update_jira_ticket applies a status transition before editing fields, as
+# some workflows only allow edits in certain statuses or validate edited
+# fields on transition. Set to 1 to run the two concurrently instead.
+PARALLEL_TICKET_UPDATE = os.getenv("JIRA_PARALLEL_UPDATE", "0") == "1"
+
+# Confluence uses its own credentials when set, falling back to the Jira ones.
+CONFLUENCE_URL = os.getenv("CONFLUENCE_URL", ATLASSIAN_URL)
+CONFLUENCE_EMAIL = os.getenv("CONFLUENCE_EMAIL", ATLASSIAN_EMAIL)
+CONFLUENCE_TOKEN = os.getenv("CONFLUENCE_TOKEN", ATLASSIAN_TOKEN)
+CONFLUENCE_MOCK_MODE = not (CONFLUENCE_URL and CONFLUENCE_EMAIL and CONFLUENCE_TOKEN)
+_CONFLUENCE_SEARCH_URL = f"{CONFLUENCE_URL}/wiki/rest/api/search"
+_CONFLUENCE_CREATE_URL = f"{CONFLUENCE_URL}/wiki/rest/api/content"
+_CONFLUENCE_CONTENT_URL = _CONFLUENCE_CREATE_URL + "/"
+_PAGE_URL = f"{CONFLUENCE_URL}/wiki/pages/viewpage.action?pageId="
+
+# Escapes a user query for use inside a double-quoted CQL string literal.
+_CQL_ESCAPE = str.maketrans({"\\": "\\\\", '"': '\\"'})
+# Longer queries are rejected before reaching Confluence, where they only
+# make CQL parsing slow.
+MAX_CQL_QUERY_LENGTH = 500
+
+# One pooled session for every Jira call, so keep-alive connections are reused
+# instead of paying a fresh TCP + TLS handshake per request.
+# The pool size is configurable to avoid "Connection pool is full" warnings
+# when many tool calls run at once.
+POOL_MAXSIZE = int(os.getenv("ATLASSIAN_POOL_MAXSIZE", "20"))
+
+# requests waits forever by default, which would pin a worker thread on a
+# stalled connection. Every call gets this timeout unless it passes its own.
+REQUEST_TIMEOUT = float(os.getenv("ATLASSIAN_TIMEOUT", "15"))
+
+# Each Atlassian site has its own rate limit, so each host gets one limiter,
+# shared by Jira and Confluence when they live on the same site. It also
+# pauses all callers when a response carries Retry-After, instead of letting
+# each one hit the 429.
+ATLASSIAN_RATE_LIMIT = int(os.getenv("ATLASSIAN_RATE_LIMIT", "10"))
+# How many times a 429 is retried, after waiting out the server's Retry-After
+RATE_LIMIT_RETRIES = 2
+
+class _AtlassianAdapter(HTTPAdapter):
+    """HTTPAdapter that applies REQUEST_TIMEOUT to requests sent without one and keeps them within a host's rate limit.
+
+    429s are retried here rather than by urllib3, so the limiter sees every
+    Retry-After and never waits longer than it allows.
+    """
+
+    def __init__(self, limiter: RateLimiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.limiter.wait()
+            response = super().send(request, timeout=REQUEST_TIMEOUT if timeout is None else timeout, **kwargs)
+            self.limiter.note_response(response.headers, response.status_code)
+            if response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                return response
+            response.close()
+
+def _mount_pool(session: requests.Session, limiter: RateLimiter) -> None:
+    """Gives a session a connection pool sized for concurrent tool calls, with retries on transient errors."""
+    adapter = _AtlassianAdapter(
+        limiter,
+        pool_connections=10,
+        pool_maxsize=POOL_MAXSIZE,
+        # Once retries run out, hand back the last response rather than raising,
+        # so each tool reports Jira's/Confluence's own status and error body.
+        # Retry-After is left to the limiter, which caps how long it waits.
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[500, 502, 503, 504],
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+def _basic_auth_header(email: str, token: str) -> str:
+    """Encodes a Basic auth header once, so sessions don't redo it on every request."""
+    return "Basic " + base64.b64encode(f"{email}:{token}".encode()).decode()
+
+JIRA_LIMITER = RateLimiter(ATLASSIAN_RATE_LIMIT, max_wait=REQUEST_TIMEOUT)
+if urlparse(CONFLUENCE_URL or "").netloc == urlparse(ATLASSIAN_URL or "").netloc:
+    CONF_LIMITER = JIRA_LIMITER
+else:
+    CONF_LIMITER = RateLimiter(ATLASSIAN_RATE_LIMIT, max_wait=REQUEST_TIMEOUT)
+
+JIRA_SESSION = requests.Session()
+_mount_pool(JIRA_SESSION, JIRA_LIMITER)
+# Ask for compressed responses explicitly; paged search JSON compresses well.
+JIRA_SESSION.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+if ATLASSIAN_EMAIL and ATLASSIAN_TOKEN:
+    JIRA_SESSION.headers["Authorization"] = _basic_auth_header(ATLASSIAN_EMAIL, ATLASSIAN_TOKEN)
+
+# Confluence may use different credentials, so it gets its own pooled session.
+CONF_SESSION = requests.Session()
+_mount_pool(CONF_SESSION, CONF_LIMITER)
+CONF_SESSION.headers.update({"Accept": "application/json", "Accept-Encoding": "gzip, deflate"})
+if CONFLUENCE_EMAIL and CONFLUENCE_TOKEN:
+    CONF_SESSION.headers["Authorization"] = _basic_auth_header(CONFLUENCE_EMAIL, CONFLUENCE_TOKEN)
+
+# Ticket details and search results are read far more often than they change,
+# so successful live lookups are kept for a short while. Write tools evict the
+# entries they may have made stale. Ticket entries include the status, which
+# can also change in the Jira UI, so they expire quickly.
+TICKET_CACHE = TTLCache(maxsize=1024, ttl=float(os.getenv("JIRA_TICKET_CACHE_TTL", "10")))
+SEARCH_CACHE = TTLCache(maxsize=512, ttl=30)
+# Lookups of missing tickets (often hallucinated IDs) are remembered too, but
+# only briefly so tickets created elsewhere show up quickly.
+NOT_FOUND_CACHE = TTLCache(maxsize=2048, ttl=30)
+_CACHE_LOCK = threading.Lock()
+
+def _cache_get(cache: TTLCache, key):
+    """Returns a cached value, or None on a miss."""
+    with _CACHE_LOCK:
+        return cache.get(key)
+
+def _cache_put(cache: TTLCache, key, value) -> None:
+    """Stores a value in one of the read caches."""
+    with _CACHE_LOCK:
+        cache[key] = value
+
+def _evict_searches() -> None:
+    """Drops all cached search results after a write."""
+    with _CACHE_LOCK:
+        SEARCH_CACHE.clear()
+
+def _evict_ticket(ticket_id: str) -> None:
+    """Drops a ticket, and any cached searches that may list it, after it has been modified."""
+    with _CACHE_LOCK:
+        TICKET_CACHE.pop(ticket_id, None)
+        NOT_FOUND_CACHE.pop(ticket_id, None)
+        SEARCH_CACHE.clear()
+
 # --- 3. Define Core Tool Functions ---
 
-def get_jira_ticket(ticket_id: str) -> dict:
+# Result shapes returned by the tools. Every tool returns a ToolError
+# ({"success": False, "error": ...}) when something goes wrong.
+class ToolError(TypedDict):
+    success: bool
+    error: str
+
+class JiraTicketResult(TypedDict):
+    success: bool
+    ticket_id: str
+    summary: str
+    status: str
+    assignee: str
+    url: str
+
+class JiraBatchResult(TypedDict):
+    success: bool
+    tickets: list[JiraTicketResult | ToolError]
+
+class JiraCreateResult(TypedDict):
+    success: bool
+    ticket_id: str
+    summary: str
+    url: str
+
+class JiraTicketSummary(TypedDict):
+    ticket_id: str
+    summary: str
+    status: str
+    url: str
+
+class JiraSearchResult(TypedDict):
+    success: bool
+    tickets: list[JiraTicketSummary]
+
+class JiraWriteResult(TypedDict):
+    success: bool
+    ticket_id: str
+    message: str
+    url: str
+
+class ConfluencePageSummary(TypedDict):
+    title: str
+    snippet: str
+    url: str
+
+class ConfluenceSearchResult(TypedDict):
+    success: bool
+    pages: list[ConfluencePageSummary]
+
+class ConfluenceCreateResult(TypedDict):
+    success: bool
+    page_id: str
+    title: str
+    url: str
+
+class ConfluencePageResult(TypedDict):
+    success: bool
+    page_id: str
+    title: str
+    content: str
+    url: str
+
+class ConfluenceWriteResult(TypedDict):
+    success: bool
+    page_id: str
+    message: str
+    url: str
+
+class BatchOperationResult(TypedDict):
+    tool: str
+    result: dict
+
+class BatchExecuteResult(TypedDict):
+    success: bool
+    results: list[BatchOperationResult]
+
+def _adf(text: str) -> dict:
+    """Wraps plain text in a minimal Atlassian Document Format document."""
+    return {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]}
+
+def _err_snippet(response: requests.Response) -> str:
+    """Returns the start of an error body; Atlassian's HTML error pages can be large."""
+    return response.content[:512].decode("utf-8", "replace")
+
+def _mock_or_live(mock, confluence: bool = False):
+    """Shared mock/live skeleton for the tools.
+
+    Without credentials the call is answered by ``mock``, which takes the same
+    arguments as the tool. Otherwise the tool runs, and any unexpected
+    exception is returned as a ToolError.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            log.debug("Tool '%s' called with: %s %s", fn.__name__, args, kwargs)
+            if CONFLUENCE_MOCK_MODE if confluence else MOCK_MODE:
+                log.debug("--> Running in MOCK MODE.")
+                return mock(*args, **kwargs)
+            log.debug("--> Running in LIVE MODE.")
+            try:
+                return fn(*args, **kwargs)
+            except RateLimited as e:
+                return {"success": False, "error": str(e)}
+            except Exception as e:
+                return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+        return wrapper
+    return decorator
+
+# Mock payloads that don't depend on the arguments are built once and shared.
+# Tool results are only ever serialized, never mutated, so this is safe.
+_MOCK_PROJ_123 = {"success": True, "ticket_id": "PROJ-123", "summary": "This is a sample ticket summary.", "status": "In Progress", "assignee": "Mock User", "url": "https://mock-jira.com/browse/PROJ-123"}
+
+def _mock_get_jira_ticket(ticket_id: str) -> JiraTicketResult | ToolError:
+    if ticket_id == "PROJ-123":
+        return _MOCK_PROJ_123
+    return {"success": False, "error": f"Ticket '{ticket_id}' not found in mock data."}
+
+@_mock_or_live(_mock_get_jira_ticket)
+def get_jira_ticket(ticket_id: str) -> JiraTicketResult | ToolError:
     """Fetches details for a specific Jira ticket."""
-    print(f"Tool 'get_jira_ticket' called with ID: {ticket_id}")
-    if not all([ATLASSIAN_URL, ATLASSIAN_EMAIL, ATLASSIAN_TOKEN]):
-        print("--> Running in MOCK MODE.")
-        if ticket_id == "PROJ-123":
-            return {"success": True, "ticket_id": ticket_id, "summary": "This is a sample ticket summary.", "status": "In Progress", "assignee": "Mock User", "url": f"https://mock-jira.com/browse/{ticket_id}"}
-        else:
-            return {"success": False, "error": f"Ticket '{ticket_id}' not found in mock data."}
-    
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{ATLASSIAN_URL}/rest/api/3/issue/{ticket_id}"
-        auth = requests.auth.HTTPBasicAuth(ATLASSIAN_EMAIL, ATLASSIAN_TOKEN)
-        headers = {"Accept": "application/json"}
-        response = requests.get(api_url, headers=headers, auth=auth)
-        if response.status_code == 200:
-            data = response.json()
-            fields = data.get("fields", {})
-            status = fields.get("status", {}).get("name", "N/A")
-            assignee = fields.get("assignee", {}).get("displayName", "Unassigned")
-            return {"success": True, "ticket_id": data.get("key"), "summary": fields.get("summary"), "status": status, "assignee": assignee, "url": f"{ATLASSIAN_URL}/browse/{data.get('key')}"}
-        else:
-            return {"success": False, "error": f"Jira API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+    cached = _cache_get(TICKET_CACHE, ticket_id)
+    if cached is not None:
+        return cached
+    cached = _cache_get(NOT_FOUND_CACHE, ticket_id)
+    if cached is not None:
+        return cached
+    api_url = _ISSUE_URL + ticket_id
+    # Only ask Jira for the fields we read; full issues can be tens of KB
+    response = JIRA_SESSION.get(api_url, params={"fields": "summary,status,assignee"})
+    if response.status_code == 200:
+        data = orjson.loads(response.content)
+        fields = data["fields"]
+        # Jira sends null (not a missing key) for an unassigned ticket
+        status = fields.get("status")
+        assignee = fields.get("assignee")
+        result = {
+            "success": True,
+            "ticket_id": data["key"],
+            "summary": fields.get("summary"),
+            "status": status["name"] if status else "N/A",
+            "assignee": assignee["displayName"] if assignee else "Unassigned",
+            "url": _BROWSE_URL + data["key"]
+        }
+        _cache_put(TICKET_CACHE, ticket_id, result)
+        return result
+    elif response.status_code == 404:
+        result = {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
+        _cache_put(NOT_FOUND_CACHE, ticket_id, result)
+        return result
+    else:
+        return {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
+
+def get_jira_tickets(ticket_ids: list) -> JiraBatchResult | ToolError:
+    """Fetches details for several Jira tickets concurrently."""
+    log.debug("Tool 'get_jira_tickets' called with IDs: %s", ticket_ids)
+    if not isinstance(ticket_ids, (list, tuple)):
+        return {"success": False, "error": "ticket_ids must be a list of ticket IDs."}
+    if not ticket_ids:
+        return {"success": False, "error": "At least one ticket ID is required."}
+
+    # Fan the lookups out so N tickets cost roughly one round-trip instead of N.
+    # Duplicates are fetched once, and the fan-out never exceeds the HTTP pool.
+    ticket_ids = [str(ticket_id) for ticket_id in ticket_ids]
+    unique_ids = list(dict.fromkeys(ticket_ids))
+    with ThreadPoolExecutor(max_workers=min(10, POOL_MAXSIZE, len(unique_ids))) as executor:
+        results = dict(zip(unique_ids, executor.map(get_jira_ticket, unique_ids)))
+    return {"success": True, "tickets": [results[ticket_id] for ticket_id in ticket_ids]}
 
-# NEW FUNCTION: create_jira_ticket
-def create_jira_ticket(project_key: str, summary: str, description: str, issue_type: str) -> dict:
+def _mock_create_jira_ticket(project_key: str, summary: str, description: str, issue_type: str) -> JiraCreateResult:
+    new_ticket_id = f"{project_key}-999" # Create a fake new ticket ID
+    return {
+        "success": True,
+        "ticket_id": new_ticket_id,
+        "summary": summary,
+        "url": f"https://mock-jira.com/browse/{new_ticket_id}"
+    }
+
+@_mock_or_live(_mock_create_jira_ticket)
+def create_jira_ticket(project_key: str, summary: str, description: str, issue_type: str) -> JiraCreateResult | ToolError:
     """Creates a new ticket in a Jira project."""
-    print(f"Tool 'create_jira_ticket' called for project: {project_key}")
+    api_url = _CREATE_ISSUE_URL
+
+    # This is the standard payload structure for creating a Jira issue
+    payload = {
+        "fields": {
+            "project": {"key": project_key},
+            "summary": summary,
+            "description": _adf(description),
+            "issuetype": {"name": issue_type}
+        }
+    }
 
-    # --- MOCK MODE ---
-    if not all([ATLASSIAN_URL, ATLASSIAN_EMAIL, ATLASSIAN_TOKEN]):
-        print("--> Running in MOCK MODE.")
-        new_ticket_id = f"{project_key}-999" # Create a fake new ticket ID
+    # json= serializes the body and sets the Content-Type header for us
+    response = JIRA_SESSION.post(api_url, json=payload)
+
+    if response.status_code == 201: # 201 Created is the success code for POST
+        data = orjson.loads(response.content)
+        _evict_ticket(data.get("key"))
         return {
             "success": True,
-            "ticket_id": new_ticket_id,
+            "ticket_id": data.get("key"),
             "summary": summary,
-            "url": f"https://mock-jira.com/browse/{new_ticket_id}"
+            "url": _BROWSE_URL + data["key"]
         }
+    else:
+        return {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
 
-    # --- LIVE MODE ---
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{ATLASSIAN_URL}/rest/api/3/issue"
-        auth = requests.auth.HTTPBasicAuth(ATLASSIAN_EMAIL, ATLASSIAN_TOKEN)
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
-        
-        # This is the standard payload structure for creating a Jira issue
-        payload = json.dumps({
-            "fields": {
-                "project": {"key": project_key},
-                "summary": summary,
-                "description": {
-                    "type": "doc",
-                    "version": 1,
-                    "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}]
-                },
-                "issuetype": {"name": issue_type}
-            }
-        })
+def _fetch_pages(session: requests.Session, url: str, params: dict, offsets: range, total: int, start_param: str, limit_param: str) -> list:
+    """Fetches the search pages starting at each offset concurrently, returning the responses in order."""
+    def fetch(start: int):
+        return session.get(url, params={**params, start_param: start, limit_param: min(offsets.step, total - start)})
 
-        response = requests.post(api_url, data=payload, headers=headers, auth=auth)
+    with ThreadPoolExecutor(max_workers=min(10, POOL_MAXSIZE, len(offsets))) as executor:
+        return list(executor.map(fetch, offsets))
 
-        if response.status_code == 201: # 201 Created is the success code for POST
-            data = response.json()
-            return {
-                "success": True,
-                "ticket_id": data.get("key"),
-                "summary": summary,
-                "url": f"{ATLASSIAN_URL}/browse/{data.get('key')}"
-            }
-        else:
-            return {"success": False, "error": f"Jira API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
-
-# NEW FUNCTION: search_jira_tickets
-
-def search_jira_tickets(jql_query: str) -> dict:
-    """Search Jira tickets using a JQL query."""
-    print(f"Tool 'search_jira_tickets' called with JQL: {jql_query}")
-    if not all([ATLASSIAN_URL, ATLASSIAN_EMAIL, ATLASSIAN_TOKEN]):
-        print("--> Running in MOCK MODE.")
-        # Return a sample list of tickets
-        return {
-            "success": True,
-            "tickets": [
-                {
-                    "ticket_id": "PROJ-101",
-                    "summary": "Fix login bug",
-                    "status": "To Do",
-                    "url": "https://mock-jira.com/browse/PROJ-101"
-                },
-                {
-                    "ticket_id": "PROJ-102",
-                    "summary": "Update documentation",
-                    "status": "In Progress",
-                    "url": "https://mock-jira.com/browse/PROJ-102"
-                }
-            ]
+# A sample list of tickets
+_MOCK_JIRA_SEARCH = {
+    "success": True,
+    "tickets": [
+        {
+            "ticket_id": "PROJ-101",
+            "summary": "Fix login bug",
+            "status": "To Do",
+            "url": "https://mock-jira.com/browse/PROJ-101"
+        },
+        {
+            "ticket_id": "PROJ-102",
+            "summary": "Update documentation",
+            "status": "In Progress",
+            "url": "https://mock-jira.com/browse/PROJ-102"
         }
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{ATLASSIAN_URL}/rest/api/3/search"
-        auth = requests.auth.HTTPBasicAuth(ATLASSIAN_EMAIL, ATLASSIAN_TOKEN)
-        headers = {"Accept": "application/json"}
-        params = {"jql": jql_query, "maxResults": 10}
-        response = requests.get(api_url, headers=headers, auth=auth, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            tickets = []
-            for issue in data.get("issues", []):
-                fields = issue.get("fields", {})
-                tickets.append({
-                    "ticket_id": issue.get("key"),
-                    "summary": fields.get("summary"),
-                    "status": fields.get("status", {}).get("name", "N/A"),
-                    "url": f"{ATLASSIAN_URL}/browse/{issue.get('key')}"
-                })
-            return {"success": True, "tickets": tickets}
-        else:
-            return {"success": False, "error": f"Jira API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
-
-# NEW FUNCTION: search_confluence_pages
-
-def search_confluence_pages(query: str) -> dict:
-    """Search Confluence pages using a text query."""
-    print(f"Tool 'search_confluence_pages' called with query: {query}")
-    # We'll use a separate set of env vars for Confluence, but fallback to Jira if not set
-    confluence_url = os.getenv("CONFLUENCE_URL", ATLASSIAN_URL)
-    confluence_email = os.getenv("CONFLUENCE_EMAIL", ATLASSIAN_EMAIL)
-    confluence_token = os.getenv("CONFLUENCE_TOKEN", ATLASSIAN_TOKEN)
-    if not all([confluence_url, confluence_email, confluence_token]):
-        print("--> Running in MOCK MODE.")
-        return {
-            "success": True,
-            "pages": [
-                {
-                    "title": "How to set up the VPN",
-                    "snippet": "Step-by-step guide to configure VPN access...",
-                    "url": "https://mock-confluence.com/pages/viewpage.action?pageId=12345"
-                },
-                {
-                    "title": "Q3 marketing plan",
-                    "snippet": "This page outlines the marketing plan for Q3...",
-                    "url": "https://mock-confluence.com/pages/viewpage.action?pageId=67890"
-                }
-            ]
+    ]
+}
+
+def _mock_search_jira_tickets(jql_query: str, max_results: int = 100, batch_size: int = 100) -> JiraSearchResult:
+    return _MOCK_JIRA_SEARCH
+
+@_mock_or_live(_mock_search_jira_tickets)
+def search_jira_tickets(jql_query: str, max_results: int = 100, batch_size: int = 100) -> JiraSearchResult | ToolError:
+    """Search Jira tickets using a JQL query, paging through up to max_results matches."""
+    max_results = max(1, min(int(max_results), 1000))
+    batch_size = max(1, min(int(batch_size), max_results))
+    cache_key = ("jira", jql_query, max_results)
+    cached = _cache_get(SEARCH_CACHE, cache_key)
+    if cached is not None:
+        return cached
+    api_url = _SEARCH_URL
+    params = {"jql": jql_query, "fields": "summary,status"}
+    response = JIRA_SESSION.get(api_url, params={**params, "startAt": 0, "maxResults": batch_size})
+    if response.status_code != 200:
+        return {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
+    data = orjson.loads(response.content)
+    issues = data.get("issues", [])
+    page_size = data.get("maxResults", batch_size)
+    if page_size < batch_size:
+        log.warning("Jira capped the search page size at %s (requested %s)", page_size, batch_size)
+    # The first page reports the total, so the remaining pages are fetched
+    # side by side instead of one round-trip after another.
+    total = min(data.get("total", 0), max_results)
+    if issues and len(issues) < total:
+        offsets = range(len(issues), total, max(1, page_size))
+        for response in _fetch_pages(JIRA_SESSION, api_url, params, offsets, total, "startAt", "maxResults"):
+            if response.status_code != 200:
+                return {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
+            issues.extend(orjson.loads(response.content).get("issues", ()))
+    tickets = []
+    for issue in issues[:max_results]:
+        key = issue["key"]
+        fields = issue["fields"]
+        status = fields.get("status")
+        tickets.append({
+            "ticket_id": key,
+            "summary": fields.get("summary"),
+            "status": status["name"] if status else "N/A",
+            "url": _BROWSE_URL + key
+        })
+    result = {"success": True, "tickets": tickets}
+    _cache_put(SEARCH_CACHE, cache_key, result)
+    return result
+
+_MOCK_CONFLUENCE_SEARCH = {
+    "success": True,
+    "pages": [
+        {
+            "title": "How to set up the VPN",
+            "snippet": "Step-by-step guide to configure VPN access...",
+            "url": "https://mock-confluence.com/pages/viewpage.action?pageId=12345"
+        },
+        {
+            "title": "Q3 marketing plan",
+            "snippet": "This page outlines the marketing plan for Q3...",
+            "url": "https://mock-confluence.com/pages/viewpage.action?pageId=67890"
         }
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{confluence_url}/wiki/rest/api/search"
-        auth = requests.auth.HTTPBasicAuth(confluence_email, confluence_token)
-        headers = {"Accept": "application/json"}
-        params = {"cql": f"text ~ '{query}'", "limit": 10}
-        response = requests.get(api_url, headers=headers, auth=auth, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            pages = []
-            for result in data.get("results", []):
-                title = result.get("title", "Untitled")
-                snippet = result.get("excerpt", "")
-                # Build the URL to the page
-                page_id = result.get("content", {}).get("id") or result.get("_id") or result.get("id")
-                url = f"{confluence_url}/wiki/pages/viewpage.action?pageId={page_id}" if page_id else confluence_url
-                pages.append({
-                    "title": title,
-                    "snippet": snippet,
-                    "url": url
-                })
-            return {"success": True, "pages": pages}
-        else:
-            return {"success": False, "error": f"Confluence API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+    ]
+}
+
+def _mock_search_confluence_pages(query: str, max_results: int = 10) -> ConfluenceSearchResult:
+    return _MOCK_CONFLUENCE_SEARCH
+
+@_mock_or_live(_mock_search_confluence_pages, confluence=True)
+def search_confluence_pages(query: str, max_results: int = 10) -> ConfluenceSearchResult | ToolError:
+    """Search Confluence pages using a text query, returning up to max_results matches."""
+    if len(query) > MAX_CQL_QUERY_LENGTH:
+        return {"success": False, "error": f"Search query is too long ({len(query)} characters, max {MAX_CQL_QUERY_LENGTH})."}
+    max_results = max(1, min(int(max_results), 100))
+    cache_key = ("confluence", query, max_results)
+    cached = _cache_get(SEARCH_CACHE, cache_key)
+    if cached is not None:
+        return cached
+    api_url = _CONFLUENCE_SEARCH_URL
+    # Escape the query so quotes in it (e.g. "don't") can't break the CQL
+    params = {"cql": f'text ~ "{query.translate(_CQL_ESCAPE)}"'}
+    response = CONF_SESSION.get(api_url, params={**params, "start": 0, "limit": max_results})
+    if response.status_code != 200:
+        return {"success": False, "error": f"Confluence API error: {response.status_code} - {_err_snippet(response)}"}
+    data = orjson.loads(response.content)
+    hits = data.get("results", [])
+    # Confluence caps the page size server-side; fetch the rest concurrently
+    total = min(data.get("totalSize", 0), max_results)
+    if hits and len(hits) < total:
+        offsets = range(len(hits), total, max(1, data.get("limit", len(hits))))
+        for response in _fetch_pages(CONF_SESSION, api_url, params, offsets, total, "start", "limit"):
+            if response.status_code != 200:
+                return {"success": False, "error": f"Confluence API error: {response.status_code} - {_err_snippet(response)}"}
+            hits.extend(orjson.loads(response.content).get("results", ()))
+    pages = []
+    for hit in hits[:max_results]:
+        # Build the URL to the page; content search hits nest the page ID
+        content = hit.get("content")
+        page_id = (content and content.get("id")) or hit.get("id")
+        pages.append({
+            "title": hit.get("title", "Untitled"),
+            "snippet": hit.get("excerpt", ""),
+            "url": _PAGE_URL + str(page_id) if page_id else CONFLUENCE_URL
+        })
+    result = {"success": True, "pages": pages}
+    _cache_put(SEARCH_CACHE, cache_key, result)
+    return result
 
 # NEW CRUD FUNCTIONS FOR JIRA
 
-def update_jira_ticket(ticket_id: str, summary: str = None, description: str = None, status: str = None, assignee: str = None) -> dict:
+def _mock_update_jira_ticket(ticket_id: str, summary: str = None, description: str = None, status: str = None, assignee: str = None) -> JiraWriteResult:
+    return {
+        "success": True,
+        "ticket_id": ticket_id,
+        "message": f"Mock update completed for {ticket_id}",
+        "url": f"https://mock-jira.com/browse/{ticket_id}"
+    }
+
+@_mock_or_live(_mock_update_jira_ticket)
+def update_jira_ticket(ticket_id: str, summary: str = None, description: str = None, status: str = None, assignee: str = None) -> JiraWriteResult | ToolError:
     """Updates an existing Jira ticket with new information."""
-    print(f"Tool 'update_jira_ticket' called for ticket: {ticket_id}")
-    
-    if not all([ATLASSIAN_URL, ATLASSIAN_EMAIL, ATLASSIAN_TOKEN]):
-        print("--> Running in MOCK MODE.")
-        return {
-            "success": True,
-            "ticket_id": ticket_id,
-            "message": f"Mock update completed for {ticket_id}",
-            "url": f"https://mock-jira.com/browse/{ticket_id}"
-        }
-    
-    print("--> Running in LIVE MODE.")
+    api_url = _ISSUE_URL + ticket_id
+
+    # Build update payload
+    fields = {}
+    if summary:
+        fields["summary"] = summary
+    if description:
+        fields["description"] = _adf(description)
+    if assignee:
+        fields["assignee"] = {"name": assignee}
+
+    if not fields and not status:
+        return {"success": False, "error": "Nothing to update: pass a summary, description, status, or assignee."}
+
     try:
-        api_url = f"{ATLASSIAN_URL}/rest/api/3/issue/{ticket_id}"
-        auth = requests.auth.HTTPBasicAuth(ATLASSIAN_EMAIL, ATLASSIAN_TOKEN)
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
-        
-        # Build update payload
-        fields = {}
-        if summary:
-            fields["summary"] = summary
-        if description:
-            fields["description"] = {
-                "type": "doc",
-                "version": 1,
-                "content": [{"type": "paragraph", "content": [{"type": "text", "text": description}]}]
-            }
-        if assignee:
-            fields["assignee"] = {"name": assignee}
-        
-        payload = {"fields": fields}
-        
-        # Handle status transition if provided
-        if status:
-            # First, get available transitions
-            transitions_url = f"{ATLASSIAN_URL}/rest/api/3/issue/{ticket_id}/transitions"
-            transitions_response = requests.get(transitions_url, headers={"Accept": "application/json"}, auth=auth)
-            if transitions_response.status_code == 200:
-                transitions = transitions_response.json().get("transitions", [])
-                for transition in transitions:
-                    if transition.get("to", {}).get("name", "").lower() == status.lower():
-                        # Execute the transition
-                        transition_payload = {"transition": {"id": transition["id"]}}
-                        transition_response = requests.post(
-                            f"{ATLASSIAN_URL}/rest/api/3/issue/{ticket_id}/transitions",
-                            data=json.dumps(transition_payload),
-                            headers=headers,
-                            auth=auth
-                        )
-                        if transition_response.status_code != 204:
-                            return {"success": False, "error": f"Failed to update status: {transition_response.text}"}
-                        break
-        
-        # Update other fields
-        response = requests.put(api_url, data=json.dumps(payload), headers=headers, auth=auth)
-        
-        if response.status_code == 204:  # 204 No Content is success for PUT
-            return {
-                "success": True,
-                "ticket_id": ticket_id,
-                "message": f"Successfully updated {ticket_id}",
-                "url": f"{ATLASSIAN_URL}/browse/{ticket_id}"
-            }
+        if PARALLEL_TICKET_UPDATE and fields and status:
+            # The field edit runs in the background while the transition is
+            # looked up and applied.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                put_future = executor.submit(JIRA_SESSION.put, api_url, json={"fields": fields})
+                transition_error = _transition_jira_ticket(ticket_id, status)
+                response = put_future.result()
         else:
-            return {"success": False, "error": f"Jira API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+            transition_error = _transition_jira_ticket(ticket_id, status) if status else None
+            response = None
+            if fields and not transition_error:
+                response = JIRA_SESSION.put(api_url, json={"fields": fields})
+    finally:
+        # Even if a request raised, an earlier one may have changed the ticket
+        _evict_ticket(ticket_id)
+
+    if transition_error:
+        return transition_error
+    if response is not None and response.status_code != 204:  # 204 No Content is success for PUT
+        return {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
+    return {
+        "success": True,
+        "ticket_id": ticket_id,
+        "message": f"Successfully updated {ticket_id}",
+        "url": _BROWSE_URL + ticket_id
+    }
+
+def _transition_jira_ticket(ticket_id: str, status: str) -> ToolError | None:
+    """Moves a ticket to the named status, returning a ToolError if Jira rejects the transition."""
+    transitions_url = _ISSUE_URL + ticket_id + "/transitions"
+    target = status.lower()
+
+    # Transition IDs belong to a workflow, which can differ per issue type
+    # within a project, so they are looked up for this ticket every time.
+    transitions_response = JIRA_SESSION.get(transitions_url)
+    if transitions_response.status_code == 200:
+        transitions = orjson.loads(transitions_response.content).get("transitions", [])
+        for transition in transitions:
+            if transition.get("to") and transition["to"]["name"].lower() == target:
+                # Execute the transition
+                transition_response = JIRA_SESSION.post(transitions_url, json={"transition": {"id": transition["id"]}})
+                if transition_response.status_code != 204:
+                    return {"success": False, "error": f"Failed to update status: {_err_snippet(transition_response)}"}
+                break
+    return None
 
-def delete_jira_ticket(ticket_id: str) -> dict:
+def _mock_delete_jira_ticket(ticket_id: str) -> JiraWriteResult:
+    return {
+        "success": True,
+        "ticket_id": ticket_id,
+        "message": f"Mock deletion completed for {ticket_id}",
+        "url": f"https://mock-jira.com/browse/{ticket_id}"
+    }
+
+@_mock_or_live(_mock_delete_jira_ticket)
+def delete_jira_ticket(ticket_id: str) -> JiraWriteResult | ToolError:
     """Deletes a Jira ticket (moves it to trash)."""
-    print(f"Tool 'delete_jira_ticket' called for ticket: {ticket_id}")
-    
-    if not all([ATLASSIAN_URL, ATLASSIAN_EMAIL, ATLASSIAN_TOKEN]):
-        print("--> Running in MOCK MODE.")
+    api_url = _ISSUE_URL + ticket_id
+    response = JIRA_SESSION.delete(api_url)
+
+    if response.status_code == 204:  # 204 No Content is success for DELETE
+        _evict_ticket(ticket_id)
         return {
             "success": True,
             "ticket_id": ticket_id,
-            "message": f"Mock deletion completed for {ticket_id}",
-            "url": f"https://mock-jira.com/browse/{ticket_id}"
+            "message": f"Successfully deleted {ticket_id}",
+            "url": _BROWSE_URL + ticket_id
         }
-    
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{ATLASSIAN_URL}/rest/api/3/issue/{ticket_id}"
-        auth = requests.auth.HTTPBasicAuth(ATLASSIAN_EMAIL, ATLASSIAN_TOKEN)
-        headers = {"Accept": "application/json"}
-        
-        response = requests.delete(api_url, headers=headers, auth=auth)
-        
-        if response.status_code == 204:  # 204 No Content is success for DELETE
-            return {
-                "success": True,
-                "ticket_id": ticket_id,
-                "message": f"Successfully deleted {ticket_id}",
-                "url": f"{ATLASSIAN_URL}/browse/{ticket_id}"
-            }
-        else:
-            return {"success": False, "error": f"Jira API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+    else:
+        return {"success": False, "error": f"Jira API error: {response.status_code} - {_err_snippet(response)}"}
 
 # NEW CRUD FUNCTIONS FOR CONFLUENCE
 
-def create_confluence_page(space_key: str, title: str, content: str, parent_page_id: str = None) -> dict:
+def _mock_create_confluence_page(space_key: str, title: str, content: str, parent_page_id: str = None) -> ConfluenceCreateResult:
+    page_id = "12345"
+    return {
+        "success": True,
+        "page_id": page_id,
+        "title": title,
+        "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+    }
+
+@_mock_or_live(_mock_create_confluence_page, confluence=True)
+def create_confluence_page(space_key: str, title: str, content: str, parent_page_id: str = None) -> ConfluenceCreateResult | ToolError:
     """Creates a new Confluence page."""
-    print(f"Tool 'create_confluence_page' called for space: {space_key}")
-    
-    confluence_url = os.getenv("CONFLUENCE_URL", ATLASSIAN_URL)
-    confluence_email = os.getenv("CONFLUENCE_EMAIL", ATLASSIAN_EMAIL)
-    confluence_token = os.getenv("CONFLUENCE_TOKEN", ATLASSIAN_TOKEN)
-    
-    if not all([confluence_url, confluence_email, confluence_token]):
-        print("--> Running in MOCK MODE.")
-        page_id = "12345"
+    api_url = _CONFLUENCE_CREATE_URL
+
+    payload = {
+        "type": "page",
+        "title": title,
+        "space": {"key": space_key},
+        "body": {
+            "storage": {
+                "value": content,
+                "representation": "storage"
+            }
+        }
+    }
+
+    if parent_page_id:
+        payload["ancestors"] = [{"id": parent_page_id}]
+
+    response = CONF_SESSION.post(api_url, json=payload)
+
+    if response.status_code == 200:
+        _evict_searches()
+        data = orjson.loads(response.content)
         return {
             "success": True,
-            "page_id": page_id,
+            "page_id": data.get("id"),
             "title": title,
-            "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+            "url": _PAGE_URL + data["id"]
         }
-    
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{confluence_url}/wiki/rest/api/content"
-        auth = requests.auth.HTTPBasicAuth(confluence_email, confluence_token)
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
-        
-        payload = {
-            "type": "page",
-            "title": title,
-            "space": {"key": space_key},
-            "body": {
-                "storage": {
-                    "value": content,
-                    "representation": "storage"
-                }
-            }
-        }
-        
-        if parent_page_id:
-            payload["ancestors"] = [{"id": parent_page_id}]
-        
-        response = requests.post(api_url, data=json.dumps(payload), headers=headers, auth=auth)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "page_id": data.get("id"),
-                "title": title,
-                "url": f"{confluence_url}/wiki/pages/viewpage.action?pageId={data.get('id')}"
-            }
-        else:
-            return {"success": False, "error": f"Confluence API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+    else:
+        return {"success": False, "error": f"Confluence API error: {response.status_code} - {_err_snippet(response)}"}
+
+def _mock_get_confluence_page(page_id: str) -> ConfluencePageResult:
+    return {
+        "success": True,
+        "page_id": page_id,
+        "title": "Sample Confluence Page",
+        "content": "This is sample content for the page...",
+        "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+    }
 
-def get_confluence_page(page_id: str) -> dict:
+@_mock_or_live(_mock_get_confluence_page, confluence=True)
+def get_confluence_page(page_id: str) -> ConfluencePageResult | ToolError:
     """Retrieves a specific Confluence page by its ID."""
-    print(f"Tool 'get_confluence_page' called for page: {page_id}")
-    
-    confluence_url = os.getenv("CONFLUENCE_URL", ATLASSIAN_URL)
-    confluence_email = os.getenv("CONFLUENCE_EMAIL", ATLASSIAN_EMAIL)
-    confluence_token = os.getenv("CONFLUENCE_TOKEN", ATLASSIAN_TOKEN)
-    
-    if not all([confluence_url, confluence_email, confluence_token]):
-        print("--> Running in MOCK MODE.")
+    api_url = _CONFLUENCE_CONTENT_URL + page_id
+    response = CONF_SESSION.get(api_url, params={"expand": "body.storage"})
+
+    if response.status_code == 200:
+        data = orjson.loads(response.content)
         return {
             "success": True,
-            "page_id": page_id,
-            "title": "Sample Confluence Page",
-            "content": "This is sample content for the page...",
-            "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+            "page_id": data.get("id"),
+            "title": data.get("title"),
+            "content": data.get("body", {}).get("storage", {}).get("value", ""),
+            "url": _PAGE_URL + data["id"]
         }
-    
-    print("--> Running in LIVE MODE.")
-    try:
-        api_url = f"{confluence_url}/wiki/rest/api/content/{page_id}?expand=body.storage"
-        auth = requests.auth.HTTPBasicAuth(confluence_email, confluence_token)
-        headers = {"Accept": "application/json"}
-        
-        response = requests.get(api_url, headers=headers, auth=auth)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "success": True,
-                "page_id": data.get("id"),
-                "title": data.get("title"),
-                "content": data.get("body", {}).get("storage", {}).get("value", ""),
-                "url": f"{confluence_url}/wiki/pages/viewpage.action?pageId={data.get('id')}"
-            }
-        else:
-            return {"success": False, "error": f"Confluence API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+    else:
+        return {"success": False, "error": f"Confluence API error: {response.status_code} - {_err_snippet(response)}"}
+
+def _mock_update_confluence_page(page_id: str, title: str = None, content: str = None) -> ConfluenceWriteResult:
+    return {
+        "success": True,
+        "page_id": page_id,
+        "message": f"Mock update completed for page {page_id}",
+        "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+    }
 
-def update_confluence_page(page_id: str, title: str = None, content: str = None) -> dict:
+@_mock_or_live(_mock_update_confluence_page, confluence=True)
+def update_confluence_page(page_id: str, title: str = None, content: str = None) -> ConfluenceWriteResult | ToolError:
     """Updates an existing Confluence page."""
-    print(f"Tool 'update_confluence_page' called for page: {page_id}")
-    
-    confluence_url = os.getenv("CONFLUENCE_URL", ATLASSIAN_URL)
-    confluence_email = os.getenv("CONFLUENCE_EMAIL", ATLASSIAN_EMAIL)
-    confluence_token = os.getenv("CONFLUENCE_TOKEN", ATLASSIAN_TOKEN)
-    
-    if not all([confluence_url, confluence_email, confluence_token]):
-        print("--> Running in MOCK MODE.")
+    # First get the current page to get the version
+    get_url = _CONFLUENCE_CONTENT_URL + page_id
+    get_response = CONF_SESSION.get(get_url)
+    if get_response.status_code != 200:
+        return {"success": False, "error": f"Failed to get page: {_err_snippet(get_response)}"}
+
+    current_data = orjson.loads(get_response.content)
+    version = current_data.get("version", {}).get("number", 1)
+
+    # Build update payload
+    payload = {
+        "version": {"number": version + 1}
+    }
+
+    if title:
+        payload["title"] = title
+    if content:
+        payload["body"] = {
+            "storage": {
+                "value": content,
+                "representation": "storage"
+            }
+        }
+
+    # Update the page
+    update_url = _CONFLUENCE_CONTENT_URL + page_id
+    response = CONF_SESSION.put(update_url, json=payload)
+
+    if response.status_code == 200:
+        _evict_searches()
         return {
             "success": True,
             "page_id": page_id,
-            "message": f"Mock update completed for page {page_id}",
-            "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+            "message": f"Successfully updated page {page_id}",
+            "url": _PAGE_URL + page_id
         }
-    
-    print("--> Running in LIVE MODE.")
-    try:
-        # First get the current page to get the version
-        get_url = f"{confluence_url}/wiki/rest/api/content/{page_id}"
-        auth = requests.auth.HTTPBasicAuth(confluence_email, confluence_token)
-        headers = {"Accept": "application/json"}
-        
-        get_response = requests.get(get_url, headers=headers, auth=auth)
-        if get_response.status_code != 200:
-            return {"success": False, "error": f"Failed to get page: {get_response.text}"}
-        
-        current_data = get_response.json()
-        version = current_data.get("version", {}).get("number", 1)
-        
-        # Build update payload
-        payload = {
-            "version": {"number": version + 1}
-        }
-        
-        if title:
-            payload["title"] = title
-        if content:
-            payload["body"] = {
-                "storage": {
-                    "value": content,
-                    "representation": "storage"
-                }
-            }
-        
-        # Update the page
-        update_url = f"{confluence_url}/wiki/rest/api/content/{page_id}"
-        headers["Content-Type"] = "application/json"
-        response = requests.put(update_url, data=json.dumps(payload), headers=headers, auth=auth)
-        
-        if response.status_code == 200:
-            return {
-                "success": True,
-                "page_id": page_id,
-                "message": f"Successfully updated page {page_id}",
-                "url": f"{confluence_url}/wiki/pages/viewpage.action?pageId={page_id}"
-            }
-        else:
-            return {"success": False, "error": f"Confluence API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+    else:
+        return {"success": False, "error": f"Confluence API error: {response.status_code} - {_err_snippet(response)}"}
 
-def delete_confluence_page(page_id: str) -> dict:
+def _mock_delete_confluence_page(page_id: str) -> ConfluenceWriteResult:
+    return {
+        "success": True,
+        "page_id": page_id,
+        "message": f"Mock deletion completed for page {page_id}",
+        "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+    }
+
+@_mock_or_live(_mock_delete_confluence_page, confluence=True)
+def delete_confluence_page(page_id: str) -> ConfluenceWriteResult | ToolError:
     """Deletes a Confluence page."""
-    print(f"Tool 'delete_confluence_page' called for page: {page_id}")
-    
-    confluence_url = os.getenv("CONFLUENCE_URL", ATLASSIAN_URL)
-    confluence_email = os.getenv("CONFLUENCE_EMAIL", ATLASSIAN_EMAIL)
-    confluence_token = os.getenv("CONFLUENCE_TOKEN", ATLASSIAN_TOKEN)
-    
-    if not all([confluence_url, confluence_email, confluence_token]):
-        print("--> Running in MOCK MODE.")
+    api_url = _CONFLUENCE_CONTENT_URL + page_id
+    response = CONF_SESSION.delete(api_url)
+
+    if response.status_code == 204:  # 204 No Content is success for DELETE
+        _evict_searches()
         return {
             "success": True,
             "page_id": page_id,
-            "message": f"Mock deletion completed for page {page_id}",
-            "url": f"https://mock-confluence.com/pages/viewpage.action?pageId={page_id}"
+            "message": f"Successfully deleted page {page_id}",
+            "url": _PAGE_URL + page_id
         }
-    
-    print("--> Running in LIVE MODE.")
+    else:
+        return {"success": False, "error": f"Confluence API error: {response.status_code} - {_err_snippet(response)}"}
+
+# BATCHED TOOL CALLS
+
+async def batch_execute(operations: list, max_concurrent: int = 4, stop_on_error: bool = False) -> BatchExecuteResult | ToolError:
+    """Runs several tool calls in one request, up to max_concurrent at a time.
+
+    Results come back in the order of the operations. With stop_on_error, the
+    first failed operation cancels the ones that haven't finished yet.
+    """
+    log.debug("Tool 'batch_execute' called with %d operations", len(operations))
+    if not operations:
+        return {"success": False, "error": "At least one operation is required."}
     try:
-        api_url = f"{confluence_url}/wiki/rest/api/content/{page_id}"
-        auth = requests.auth.HTTPBasicAuth(confluence_email, confluence_token)
-        headers = {"Accept": "application/json"}
-        
-        response = requests.delete(api_url, headers=headers, auth=auth)
-        
-        if response.status_code == 204:  # 204 No Content is success for DELETE
-            return {
-                "success": True,
-                "page_id": page_id,
-                "message": f"Successfully deleted page {page_id}",
-                "url": f"{confluence_url}/wiki/pages/viewpage.action?pageId={page_id}"
-            }
+        max_concurrent = int(max_concurrent)
+    except (TypeError, ValueError):
+        return {"success": False, "error": f"max_concurrent must be an integer, got {max_concurrent!r}."}
+    # LLMs sometimes send booleans as strings, and "false" would be truthy
+    if isinstance(stop_on_error, str):
+        flag = stop_on_error.strip().lower()
+        if flag not in ("true", "false", "1", "0", "yes", "no"):
+            return {"success": False, "error": f"stop_on_error must be true or false, got {stop_on_error!r}."}
+        stop_on_error = flag in ("true", "1", "yes")
+    semaphore = asyncio.Semaphore(max(1, min(max_concurrent, POOL_MAXSIZE)))
+
+    started = set()
+
+    async def run(index: int, operation) -> dict:
+        if not isinstance(operation, dict) or not operation.get("tool"):
+            return {"success": False, "error": "Each operation needs a 'tool' name."}
+        if operation["tool"] == "batch_execute":
+            return {"success": False, "error": "batch_execute cannot be nested."}
+        async with semaphore:
+            started.add(index)
+            try:
+                return await dispatch(operation["tool"], operation.get("arguments") or {})
+            except Exception as e:
+                return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+
+    tasks = [asyncio.create_task(run(index, operation)) for index, operation in enumerate(operations)]
+    if stop_on_error:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if any(not task.result().get("success") for task in done):
+                # Only operations still waiting for a slot are skipped. One that
+                # has started may already have written to Jira/Confluence, so
+                # it finishes and reports its real result.
+                for index, task in enumerate(tasks):
+                    if task in pending and index not in started:
+                        task.cancel()
+                break
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    skipped = {"success": False, "error": "Skipped after an earlier operation failed."}
+    return {
+        "success": True,
+        "results": [
+            {"tool": operation.get("tool") if isinstance(operation, dict) else None, "result": skipped if task.cancelled() else task.result()}
+            for operation, task in zip(operations, tasks)
+        ]
+    }
+
+# --- 4. Tool Registry ---
+# The tool definitions never change, so they are built once here instead of
+# on every list_tools request. They are plain schemas; the MCP Tool objects
+# are only built when running as the server, since importing any mcp module
+# loads the whole client and server stack.
+_TOOLS = [
+    {
+        "name": "get_jira_ticket",
+        "description": "Retrieves the summary, status, and assignee for a specific Jira ticket by its ID.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "ticket_id": {"type": "string", "description": "The ID of the Jira ticket (e.g., 'PROJ-123')"}
+            },
+            "required": ["ticket_id"]
+        }
+    },
+    {
+        "name": "get_jira_tickets",
+        "description": "Retrieves the summary, status, and assignee for several Jira tickets at once.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "ticket_ids": {"type": "array", "items": {"type": "string"}, "description": "The IDs of the Jira tickets (e.g., ['PROJ-123', 'PROJ-124'])"}
+            },
+            "required": ["ticket_ids"]
+        }
+    },
+    # NEW TOOL DEFINITION
+    {
+        "name": "create_jira_ticket",
+        "description": "Creates a new issue (e.g., Task, Bug, Story) in a specified Jira project.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "project_key": {"type": "string", "description": "The key for the Jira project (e.g., 'PROJ')."},
+                "summary": {"type": "string", "description": "The title or summary of the new issue."},
+                "description": {"type": "string", "description": "The detailed description for the issue."},
+                "issue_type": {"type": "string", "description": "The type of issue to create (e.g., 'Task', 'Bug', 'Story')."}
+            },
+            "required": ["project_key", "summary", "description", "issue_type"]
+        }
+    },
+    {
+        "name": "search_jira_tickets",
+        "description": "Searches for Jira tickets using a JQL query and returns a list of matching tickets (ID, summary, status, URL).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "jql_query": {"type": "string", "description": "A Jira Query Language (JQL) string to search for tickets."},
+                "max_results": {"type": "integer", "minimum": 1, "maximum": 1000, "default": 100, "description": "Maximum number of tickets to return (optional, default 100)."},
+                "batch_size": {"type": "integer", "minimum": 1, "maximum": 1000, "default": 100, "description": "Number of tickets to fetch per Jira request (optional, default 100)."}
+            },
+            "required": ["jql_query"]
+        }
+    },
+    {
+        "name": "search_confluence_pages",
+        "description": "Searches Confluence for pages matching a text query and returns a list of relevant pages (title, snippet, URL).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "maxLength": MAX_CQL_QUERY_LENGTH, "description": "A text query to search for Confluence pages."},
+                "max_results": {"type": "integer", "minimum": 1, "maximum": 100, "default": 10, "description": "Maximum number of pages to return (optional, default 10)."}
+            },
+            "required": ["query"]
+        }
+    },
+    # NEW JIRA CRUD TOOLS
+    {
+        "name": "update_jira_ticket",
+        "description": "Updates an existing Jira ticket with new summary, description, status, or assignee.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "ticket_id": {"type": "string", "description": "The ID of the Jira ticket to update (e.g., 'PROJ-123')"},
+                "summary": {"type": "string", "description": "New summary/title for the ticket (optional)"},
+                "description": {"type": "string", "description": "New description for the ticket (optional)"},
+                "status": {"type": "string", "description": "New status for the ticket (e.g., 'In Progress', 'Done') (optional)"},
+                "assignee": {"type": "string", "description": "Username of the new assignee (optional)"}
+            },
+            "required": ["ticket_id"]
+        }
+    },
+    {
+        "name": "delete_jira_ticket",
+        "description": "Deletes a Jira ticket (moves it to trash).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "ticket_id": {"type": "string", "description": "The ID of the Jira ticket to delete (e.g., 'PROJ-123')"}
+            },
+            "required": ["ticket_id"]
+        }
+    },
+    # NEW CONFLUENCE CRUD TOOLS
+    {
+        "name": "create_confluence_page",
+        "description": "Creates a new Confluence page in a specified space.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "space_key": {"type": "string", "description": "The key of the Confluence space (e.g., 'TEAM')"},
+                "title": {"type": "string", "description": "The title of the new page"},
+                "content": {"type": "string", "description": "The content of the page (can include Confluence markup)"},
+                "parent_page_id": {"type": "string", "description": "ID of the parent page (optional, for creating sub-pages)"}
+            },
+            "required": ["space_key", "title", "content"]
+        }
+    },
+    {
+        "name": "get_confluence_page",
+        "description": "Retrieves a specific Confluence page by its ID.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "page_id": {"type": "string", "description": "The ID of the Confluence page to retrieve"}
+            },
+            "required": ["page_id"]
+        }
+    },
+    {
+        "name": "update_confluence_page",
+        "description": "Updates an existing Confluence page with new title and/or content.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "page_id": {"type": "string", "description": "The ID of the Confluence page to update"},
+                "title": {"type": "string", "description": "New title for the page (optional)"},
+                "content": {"type": "string", "description": "New content for the page (optional)"}
+            },
+            "required": ["page_id"]
+        }
+    },
+    {
+        "name": "delete_confluence_page",
+        "description": "Deletes a Confluence page.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "page_id": {"type": "string", "description": "The ID of the Confluence page to delete"}
+            },
+            "required": ["page_id"]
+        }
+    },
+    {
+        "name": "batch_execute",
+        "description": "Runs several of the other tools in one call, a few at a time, and returns each result in order. Use it when a request needs more than one operation.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "operations": {
+                    "type": "array",
+                    "minItems": 1,
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool": {"type": "string", "description": "The name of the tool to call."},
+                            "arguments": {"type": "object", "description": "The arguments for that tool."}
+                        },
+                        "required": ["tool"]
+                    },
+                    "description": "The tool calls to run, e.g. [{\"tool\": \"get_jira_ticket\", \"arguments\": {\"ticket_id\": \"PROJ-123\"}}]."
+                },
+                "max_concurrent": {"type": "integer", "minimum": 1, "default": 4, "description": "How many operations may run at the same time (optional, default 4)."},
+                "stop_on_error": {"type": "boolean", "default": False, "description": "Cancel the remaining operations once one fails (optional, default false)."}
+            },
+            "required": ["operations"]
+        }
+    },
+]
+
+# Maps each tool name to its function. The argument specs are read from each
+# tool's inputSchema into _SPECS below.
+_DISPATCH = {
+    "get_jira_ticket": get_jira_ticket,
+    "get_jira_tickets": get_jira_tickets,
+    "create_jira_ticket": create_jira_ticket,
+    "search_jira_tickets": search_jira_tickets,
+    "search_confluence_pages": search_confluence_pages,
+    "update_jira_ticket": update_jira_ticket,
+    "delete_jira_ticket": delete_jira_ticket,
+    "create_confluence_page": create_confluence_page,
+    "get_confluence_page": get_confluence_page,
+    "update_confluence_page": update_confluence_page,
+    "delete_confluence_page": delete_confluence_page,
+    "batch_execute": batch_execute,
+}
+
+def _spec(tool: dict) -> tuple:
+    """Reads a tool's (function, required, optional, string-typed, array-typed) arguments from its schema.
+
+    Array arguments map to whether their items are strings.
+    """
+    properties = tool["inputSchema"]["properties"]
+    required = tuple(tool["inputSchema"].get("required", ()))
+    optional = tuple(key for key in properties if key not in required)
+    strings = frozenset(key for key, prop in properties.items() if prop.get("type") == "string")
+    arrays = {key: prop.get("items", {}).get("type") == "string" for key, prop in properties.items() if prop.get("type") == "array"}
+    return _DISPATCH[tool["name"]], required, optional, strings, arrays
+
+# Built once from the schemas above, so validation can't drift from what
+# list_tools advertises.
+_SPECS = {tool["name"]: _spec(tool) for tool in _TOOLS}
+
+async def dispatch(name: str, arguments: dict) -> dict:
+    """Validates the arguments for a tool call and runs the tool.
+
+    The tool functions do blocking HTTP I/O, so they run in a worker thread
+    to keep the event loop free for other requests.
+    """
+    spec = _SPECS.get(name)
+    if spec is None:
+        return {"success": False, "error": f"Unknown tool: {name}"}
+    fn, required, optional, strings, arrays = spec
+    arguments = arguments or {}
+    missing = [key for key in required if not arguments.get(key)]
+    if missing:
+        return {"success": False, "error": f"Missing required arguments: {', '.join(missing)}"}
+    # Type safety: string-typed values are passed on as strings
+    kwargs = {key: arguments[key] for key in required}
+    kwargs.update({key: arguments[key] for key in optional if arguments.get(key) is not None})
+    for key in strings.intersection(kwargs):
+        kwargs[key] = str(kwargs[key])
+    for key, of_strings in arrays.items():
+        value = kwargs.get(key)
+        if value is None or isinstance(value, list):
+            continue
+        # LLMs often send "PROJ-1, PROJ-2" for a list of IDs
+        if of_strings and isinstance(value, str):
+            kwargs[key] = value.replace(",", " ").split()
         else:
-            return {"success": False, "error": f"Confluence API error: {response.status_code} - {response.text}"}
-    except Exception as e:
-        return {"success": False, "error": f"An unexpected error occurred: {str(e)}"}
+            return {"success": False, "error": f"{key} must be a list."}
+    if asyncio.iscoroutinefunction(fn):
+        return await fn(**kwargs)
+    return await asyncio.to_thread(fn, **kwargs)
 
-# --- 4. Main Server Execution Block ---
+# --- 5. Main Server Execution Block ---
 if __name__ == "__main__":
+    # The mcp package is only needed when running as the MCP server, so
+    # importing main for its tool functions doesn't load it.
+    from mcp.server import Server
+    from mcp.server.models import InitializationOptions
+    from mcp.server.lowlevel import NotificationOptions
+    from mcp.server.stdio import stdio_server
+    from mcp.types import TextContent, Tool
+
+    TOOLS = [Tool(**tool) for tool in _TOOLS]
+
     server = Server("atlassian-mcp-server")
 
     @server.list_tools()
     async def handle_list_tools():
         """Return the list of available tools."""
-        return [
-            Tool(
-                name="get_jira_ticket",
-                description="Retrieves the summary, status, and assignee for a specific Jira ticket by its ID.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "ticket_id": {"type": "string", "description": "The ID of the Jira ticket (e.g., 'PROJ-123')"}
-                    },
-                    "required": ["ticket_id"]
-                }
-            ),
-            # NEW TOOL DEFINITION
-            Tool(
-                name="create_jira_ticket",
-                description="Creates a new issue (e.g., Task, Bug, Story) in a specified Jira project.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "project_key": {"type": "string", "description": "The key for the Jira project (e.g., 'PROJ')."},
-                        "summary": {"type": "string", "description": "The title or summary of the new issue."},
-                        "description": {"type": "string", "description": "The detailed description for the issue."},
-                        "issue_type": {"type": "string", "description": "The type of issue to create (e.g., 'Task', 'Bug', 'Story')."}
-                    },
-                    "required": ["project_key", "summary", "description", "issue_type"]
-                }
-            ),
-            Tool(
-                name="search_jira_tickets",
-                description="Searches for Jira tickets using a JQL query and returns a list of matching tickets (ID, summary, status, URL).",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "jql_query": {"type": "string", "description": "A Jira Query Language (JQL) string to search for tickets."}
-                    },
-                    "required": ["jql_query"]
-                }
-            ),
-            Tool(
-                name="search_confluence_pages",
-                description="Searches Confluence for pages matching a text query and returns a list of relevant pages (title, snippet, URL).",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "A text query to search for Confluence pages."}
-                    },
-                    "required": ["query"]
-                }
-            ),
-            # NEW JIRA CRUD TOOLS
-            Tool(
-                name="update_jira_ticket",
-                description="Updates an existing Jira ticket with new summary, description, status, or assignee.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "ticket_id": {"type": "string", "description": "The ID of the Jira ticket to update (e.g., 'PROJ-123')"},
-                        "summary": {"type": "string", "description": "New summary/title for the ticket (optional)"},
-                        "description": {"type": "string", "description": "New description for the ticket (optional)"},
-                        "status": {"type": "string", "description": "New status for the ticket (e.g., 'In Progress', 'Done') (optional)"},
-                        "assignee": {"type": "string", "description": "Username of the new assignee (optional)"}
-                    },
-                    "required": ["ticket_id"]
-                }
-            ),
-            Tool(
-                name="delete_jira_ticket",
-                description="Deletes a Jira ticket (moves it to trash).",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "ticket_id": {"type": "string", "description": "The ID of the Jira ticket to delete (e.g., 'PROJ-123')"}
-                    },
-                    "required": ["ticket_id"]
-                }
-            ),
-            # NEW CONFLUENCE CRUD TOOLS
-            Tool(
-                name="create_confluence_page",
-                description="Creates a new Confluence page in a specified space.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "space_key": {"type": "string", "description": "The key of the Confluence space (e.g., 'TEAM')"},
-                        "title": {"type": "string", "description": "The title of the new page"},
-                        "content": {"type": "string", "description": "The content of the page (can include Confluence markup)"},
-                        "parent_page_id": {"type": "string", "description": "ID of the parent page (optional, for creating sub-pages)"}
-                    },
-                    "required": ["space_key", "title", "content"]
-                }
-            ),
-            Tool(
-                name="get_confluence_page",
-                description="Retrieves a specific Confluence page by its ID.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "page_id": {"type": "string", "description": "The ID of the Confluence page to retrieve"}
-                    },
-                    "required": ["page_id"]
-                }
-            ),
-            Tool(
-                name="update_confluence_page",
-                description="Updates an existing Confluence page with new title and/or content.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "page_id": {"type": "string", "description": "The ID of the Confluence page to update"},
-                        "title": {"type": "string", "description": "New title for the page (optional)"},
-                        "content": {"type": "string", "description": "New content for the page (optional)"}
-                    },
-                    "required": ["page_id"]
-                }
-            ),
-            Tool(
-                name="delete_confluence_page",
-                description="Deletes a Confluence page.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "page_id": {"type": "string", "description": "The ID of the Confluence page to delete"}
-                    },
-                    "required": ["page_id"]
-                }
-            )
-        ]
+        return TOOLS
 
     @server.call_tool()
     async def handle_call_tool(name: str, arguments: dict):
         """Handle tool calls."""
-        result = {}
-        if name == "get_jira_ticket":
-            ticket_id = arguments.get("ticket_id")
-            if not ticket_id:
-                result = {"success": False, "error": "ticket_id is required"}
-            else:
-                result = get_jira_ticket(ticket_id)
-
-        # NEW TOOL HANDLER
-        elif name == "create_jira_ticket":
-            # Extract arguments using .get() to avoid errors if one is missing
-            project_key = arguments.get("project_key")
-            summary = arguments.get("summary")
-            description = arguments.get("description")
-            issue_type = arguments.get("issue_type")
-            
-            if not all([project_key, summary, description, issue_type]):
-                result = {"success": False, "error": "Missing one or more required arguments: project_key, summary, description, issue_type"}
-            else:
-                # Type safety: ensure all values are strings
-                result = create_jira_ticket(
-                    str(project_key), 
-                    str(summary), 
-                    str(description), 
-                    str(issue_type)
-                )
-        elif name == "search_jira_tickets":
-            jql_query = arguments.get("jql_query")
-            if not jql_query:
-                result = {"success": False, "error": "jql_query is required"}
-            else:
-                result = search_jira_tickets(str(jql_query))
-        elif name == "search_confluence_pages":
-            query = arguments.get("query")
-            if not query:
-                result = {"success": False, "error": "query is required"}
-            else:
-                result = search_confluence_pages(str(query))
-        # NEW JIRA CRUD HANDLERS
-        elif name == "update_jira_ticket":
-            ticket_id = arguments.get("ticket_id")
-            if not ticket_id:
-                result = {"success": False, "error": "ticket_id is required"}
-            else:
-                summary = arguments.get("summary")
-                description = arguments.get("description")
-                status = arguments.get("status")
-                assignee = arguments.get("assignee")
-                result = update_jira_ticket(str(ticket_id), summary, description, status, assignee)
-        elif name == "delete_jira_ticket":
-            ticket_id = arguments.get("ticket_id")
-            if not ticket_id:
-                result = {"success": False, "error": "ticket_id is required"}
-            else:
-                result = delete_jira_ticket(str(ticket_id))
-        # NEW CONFLUENCE CRUD HANDLERS
-        elif name == "create_confluence_page":
-            space_key = arguments.get("space_key")
-            title = arguments.get("title")
-            content = arguments.get("content")
-            parent_page_id = arguments.get("parent_page_id")
-            
-            if not all([space_key, title, content]):
-                result = {"success": False, "error": "Missing required arguments: space_key, title, content"}
-            else:
-                result = create_confluence_page(str(space_key), str(title), str(content), parent_page_id)
-        elif name == "get_confluence_page":
-            page_id = arguments.get("page_id")
-            if not page_id:
-                result = {"success": False, "error": "page_id is required"}
-            else:
-                result = get_confluence_page(str(page_id))
-        elif name == "update_confluence_page":
-            page_id = arguments.get("page_id")
-            if not page_id:
-                result = {"success": False, "error": "page_id is required"}
-            else:
-                title = arguments.get("title")
-                content = arguments.get("content")
-                result = update_confluence_page(str(page_id), title, content)
-        elif name == "delete_confluence_page":
-            page_id = arguments.get("page_id")
-            if not page_id:
-                result = {"success": False, "error": "page_id is required"}
-            else:
-                result = delete_confluence_page(str(page_id))
-        else:
-            result = {"success": False, "error": f"Unknown tool: {name}"}
-        
-        return [TextContent(type="text", text=str(result))]
+        result = await dispatch(name, arguments)
+
+        # Emit real JSON (not a Python repr) so clients can parse it directly
+        return [TextContent(type="text", text=orjson.dumps(result).decode())]
+
+    # Capabilities depend only on the handlers registered above, so the
+    # initialization options are computed once.
+    INIT_OPTIONS = InitializationOptions(
+        server_name="atlassian-mcp-server",
+        server_version="1.0.0",
+        capabilities=server.get_capabilities(
+            notification_options=NotificationOptions(),
+            experimental_capabilities={},
+        ),
+    )
 
     async def main():
-        async with stdio_server() as (read_stream, write_stream):
-            await server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="atlassian-mcp-server",
-                    server_version="1.0.0",
-                    capabilities=server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={},
-                    ),
-                ),
-            )
-
-    print("=============================================")
-    print("  Atlassian MCP Server - Phase 2 Started   ")
-    print("  Mode: Mock (unless .env is configured)   ")
-    print("  Tools Registered: get_jira_ticket, create_jira_ticket")
-    print("=============================================")
-    print("\nServer is listening for requests. Connect with an MCP client.")
+        # asyncio.to_thread uses the loop's default executor, which is capped at
+        # min(32, CPU count + 4) threads. Size it to the HTTP pool instead so
+        # concurrent tool calls are limited by connections, not by CPU count.
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=POOL_MAXSIZE, thread_name_prefix="atlassian-tool")
+        )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, INIT_OPTIONS)
+        finally:
+            JIRA_SESSION.close()
+            CONF_SESSION.close()
+
+    # Tool-call tracing is logged at DEBUG and skipped entirely unless MCP_DEBUG=1
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG if os.getenv("MCP_DEBUG") == "1" else logging.WARNING)
+
+    print("=============================================", file=sys.stderr)
+    print("  Atlassian MCP Server - Phase 2 Started   ", file=sys.stderr)
+    print("  Mode: Mock (unless .env is configured)   ", file=sys.stderr)
+    print("  Tools Registered: get_jira_ticket, create_jira_ticket", file=sys.stderr)
+    print("=============================================", file=sys.stderr)
+    print("\nServer is listening for requests. Connect with an MCP client.", file=sys.stderr)
     
-    asyncio.run(main())
+    # uvloop is optional; it's a faster drop-in event loop where it's installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -0,0 +1,91 @@
+# ratelimit.py
+# Client-side throttling for the Atlassian REST API, used by main.py's sessions.
+
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class RateLimited(Exception):
+    """Raised when the server has asked callers to back off for longer than they may wait."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited by the Atlassian API; retry in {math.ceil(retry_after)}s.")
+        self.retry_after = retry_after
+
+
+def _seconds_until(value: str) -> float | None:
+    """Parses a Retry-After / reset header (delta seconds, HTTP date or ISO timestamp) into seconds from now."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return seconds if math.isfinite(seconds) else None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - datetime.now(timezone.utc)).total_seconds()
+
+
+class RateLimiter:
+    """Sliding-window limiter that also honours the server's own back-off headers.
+
+    At most `max_calls` requests start within any `period` seconds. When a
+    response says to slow down (Retry-After, or X-RateLimit-Remaining: 0),
+    every caller waits until the server's window has passed, unless that is
+    more than `max_wait` seconds away, in which case wait() raises RateLimited
+    rather than tie up the thread. Thread-safe, since tool calls run in
+    worker threads.
+    """
+
+    def __init__(self, max_calls: int, period: float = 1.0, max_wait: float = 15.0):
+        self.max_calls = max(1, max_calls)
+        self.period = period
+        self.max_wait = max_wait
+        self._calls = deque()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Blocks until another request may start, then records it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.period:
+                    self._calls.popleft()
+                delay = self._blocked_until - now
+                if delay > self.max_wait:
+                    raise RateLimited(delay)
+                if delay <= 0 and len(self._calls) >= self.max_calls:
+                    delay = self._calls[0] + self.period - now
+                if delay <= 0:
+                    self._calls.append(now)
+                    return
+            time.sleep(delay)
+
+    def note_response(self, headers, status_code: int | None = None) -> None:
+        """Pauses all callers if the response asks for it.
+
+        A 429 without a usable back-off header still pauses callers for one
+        `period`, so a retry doesn't go straight back to the server.
+        """
+        retry_after = headers.get("Retry-After")
+        if retry_after is None and headers.get("X-RateLimit-Remaining") == "0":
+            retry_after = headers.get("X-RateLimit-Reset")
+        seconds = _seconds_until(retry_after) if retry_after is not None else None
+        if seconds is None and status_code == 429:
+            seconds = self.period
+        if seconds is None or seconds <= 0:
+            return
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
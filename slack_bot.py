@@ -4,7 +4,8 @@
 import os
 import asyncio
 import subprocess
-import json
+import orjson
+import anyio
 from dotenv import load_dotenv
 from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from slack_bolt.async_app import AsyncApp
@@ -13,8 +14,17 @@ import sys
 from mcp.client.session import ClientSession
 from mcp.types import TextContent
 import requests
+from requests.adapters import HTTPAdapter
 import re
-import ast
+import shlex
+import hashlib
+import time
+from datetime import timedelta
+import contextlib
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 # --- 1. Load Configuration ---
 load_dotenv()
@@ -28,233 +38,590 @@ SLACK_APP_TOKEN = os.getenv("SLACK_APP_TOKEN") # Starts with "xapp-"
 # We use AsyncApp for compatibility with our async MCP client.
 app = AsyncApp(token=SLACK_BOT_TOKEN)
 
+log = logging.getLogger("slack_bot")
+
+# --- 2a. Adaptive Concurrency Limits ---
+# A burst of mentions shouldn't queue a dozen generations on a local model.
+# Each limiter lets `limit` calls through at once: the limit grows by one while
+# calls stay under the target latency and halves when they slow down or time out.
+class AdaptiveLimiter:
+    SAMPLE_EVERY = 8
+
+    def __init__(self, max_limit: int, target_latency: float, overload_errors: tuple = ()):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.target_latency = target_latency
+        self.overload_errors = overload_errors
+        self._active = 0
+        self._latencies = deque(maxlen=16)
+        self._samples = 0
+        self._cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        start = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except self.overload_errors:
+            overloaded = True
+            raise
+        finally:
+            async with self._cond:
+                self._active -= 1
+                self._record(time.monotonic() - start, overloaded)
+                self._cond.notify_all()
+
+    def _record(self, latency: float, overloaded: bool):
+        if overloaded:
+            self.limit = max(1, self.limit // 2)
+            return
+        self._latencies.append(latency)
+        self._samples += 1
+        if self._samples % self.SAMPLE_EVERY:
+            return
+        if sum(self._latencies) / len(self._latencies) <= self.target_latency:
+            self.limit = min(self.max_limit, self.limit + 1)
+        else:
+            self.limit = max(1, self.limit // 2)
+
+LLM_LIMITER = AdaptiveLimiter(
+    int(os.getenv("LLM_MAX_CONCURRENCY", "2")),
+    float(os.getenv("LLM_TARGET_LATENCY", "15")),
+    # A read timeout mid-stream surfaces from iter_lines() as a ConnectionError
+    overload_errors=(requests.Timeout, requests.ConnectionError),
+)
+MCP_LIMITER = AdaptiveLimiter(
+    int(os.getenv("MCP_MAX_CONCURRENCY", "8")),
+    float(os.getenv("MCP_TARGET_LATENCY", "5")),
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service that has been failing."""
+
+# After `fail_max` failures in a row a breaker opens, and calls fail at once
+# for `reset_timeout` seconds instead of each waiting out its own timeout.
+# Then one call is let through to probe: success closes the breaker, failure
+# opens it again. Opening also drops the matching limiter to one slot, and
+# the limiter grows back as calls succeed.
+class CircuitBreaker:
+    def __init__(self, service: str, limiter: AdaptiveLimiter, fail_max: int = 5, reset_timeout: float = 30):
+        self.service = service
+        self.limiter = limiter
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.fail_count = 0
+        self.opened_at = 0.0
+
+    @contextlib.asynccontextmanager
+    async def guard(self):
+        if self.state != "closed":
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "half_open" or remaining > 0:
+                raise CircuitOpenError(f"{self.service} is unavailable right now; please try again in {max(1, round(remaining))}s.")
+            self.state = "half_open" # This call is the probe
+        probing = self.state == "half_open"
+        try:
+            yield
+        except Exception:
+            self.fail_count += 1
+            if probing or self.fail_count >= self.fail_max:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.fail_count = 0
+                self.limiter.limit = 1
+                log.warning("%s failing; short-circuiting calls for %ss", self.service, self.reset_timeout)
+            raise
+        except BaseException:
+            if probing:
+                self.state = "open" # Cancelled probe; let the next call try
+            raise
+        else:
+            self.fail_count = 0
+            self.state = "closed"
+
+LLM_BREAKER = CircuitBreaker("The language model", LLM_LIMITER)
+MCP_BREAKER = CircuitBreaker("The tool server", MCP_LIMITER)
+
+# --- 2b. Shared MCP Server Connection ---
+# How long a stdio tool call may take before it counts as a failure, so a
+# hung server trips MCP_BREAKER instead of blocking mentions indefinitely.
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "60"))
+
+class MCPServerConnection:
+    """A long-lived main.py subprocess shared by every Slack event.
+
+    Spawning and initializing a fresh server per mention cost far more than the
+    tool call itself. The stdio client must be entered and exited in the same
+    task, so a dedicated task owns it while event handlers only use the session.
+    """
+
+    def __init__(self, params: StdioServerParameters):
+        self._params = params
+        self._lock = asyncio.Lock()
+        self._session = None
+        self._task = None
+        self._stop = None
+
+    async def _serve(self, ready: asyncio.Future):
+        try:
+            async with stdio_client(self._params) as (read, write):
+                async with ClientSession(read, write, read_timeout_seconds=timedelta(seconds=MCP_CALL_TIMEOUT)) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await self._stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                log.warning("MCP server connection closed: %s", e)
+
+    async def _close(self):
+        if self._task is not None:
+            self._stop.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = self._session = None
+
+    async def session(self) -> ClientSession:
+        """Returns the shared session, (re)starting the server if it isn't running."""
+        async with self._lock:
+            if self._session is None or self._task.done():
+                await self._close()
+                ready = asyncio.get_running_loop().create_future()
+                self._stop = asyncio.Event()
+                self._task = asyncio.create_task(self._serve(ready))
+                self._session = await ready
+            return self._session
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Calls a tool, restarting the server once if the connection has broken."""
+        async with MCP_LIMITER.slot():
+            session = await self.session()
+            try:
+                return await session.call_tool(name=name, arguments=arguments)
+            except (BrokenPipeError, anyio.ClosedResourceError, anyio.BrokenResourceError):
+                log.warning("MCP server connection lost; restarting it.")
+                async with self._lock:
+                    if self._session is session:
+                        await self._close()
+                session = await self.session()
+                return await session.call_tool(name=name, arguments=arguments)
+
+    async def close(self):
+        async with self._lock:
+            await self._close()
+
+MCP_SERVER = MCPServerConnection(StdioServerParameters(command=os.path.abspath("main.py")))
+
+# When the bot runs next to main.py (the default), tools are called in-process
+# through main.dispatch, skipping the subprocess and the JSON-RPC round trip.
+# Set MCP_INPROC=0 to go through the stdio server instead.
+MCP_INPROC = os.getenv("MCP_INPROC", "1") == "1"
+if MCP_INPROC:
+    from main import dispatch, POOL_MAXSIZE
+
+async def run_tool(tool_name: str, arguments: dict):
+    """Runs a tool; returns (result dict, None), or (None, raw text) if the reply wasn't JSON."""
+    if MCP_INPROC:
+        async with MCP_LIMITER.slot():
+            return await dispatch(tool_name, arguments), None
+    async with MCP_BREAKER.guard():
+        response = await MCP_SERVER.call_tool(tool_name, arguments)
+    # The response from our server is a TextContent object containing a string
+    content_block = response.content[0] if response.content else None
+    if content_block is None:
+        result_text = '[No content returned from tool]'
+    elif isinstance(content_block, TextContent):
+        result_text = content_block.text
+    elif getattr(content_block, 'type', None) == 'image':
+        result_text = '[Image content received]'
+    elif getattr(content_block, 'type', None) == 'audio':
+        result_text = '[Audio content received]'
+    elif getattr(content_block, 'type', None) == 'resource':
+        result_text = '[Embedded resource received]'
+    else:
+        result_text = str(content_block)
+    log.debug("result_text before JSON parsing: %s", result_text)
+    try:
+        return orjson.loads(result_text), None
+    except orjson.JSONDecodeError as e:
+        # The server always replies with JSON, so this is a placeholder
+        # such as '[No content returned from tool]'
+        log.debug("Tool result is not JSON: %s", e)
+        return None, result_text
+
+# --- 2c. Ollama Client ---
+# One pooled session for every LLM request keeps the connection to Ollama
+# alive between mentions. Requests run in a worker thread so a slow generation
+# doesn't block the event loop (and every other mention) while it runs.
+OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
+OLLAMA_TIMEOUT = 120
+OLLAMA_SESSION = requests.Session()
+OLLAMA_SESSION.mount("http://", HTTPAdapter(pool_maxsize=16))
+
 # --- 3. The "Fake AI" Command Parser ---
-# In a real app, an LLM would generate the tool name and arguments.
-# For our project, we'll parse the command from the Slack message directly.
+# Structured commands are parsed directly, so they never wait on the LLM.
 # Format: @bot <tool_name> <arg1> <arg2> ...
+# Arguments are positional, in the order below; quote ones with spaces.
+COMMAND_ARGS = {
+    # tool name: (argument names, number of required arguments)
+    "get_jira_ticket": (("ticket_id",), 1),
+    "create_jira_ticket": (("project_key", "summary", "description", "issue_type"), 4),
+    "update_jira_ticket": (("ticket_id", "summary", "description", "status", "assignee"), 1),
+    "delete_jira_ticket": (("ticket_id",), 1),
+    "create_confluence_page": (("space_key", "title", "content", "parent_page_id"), 3),
+    "get_confluence_page": (("page_id",), 1),
+    "update_confluence_page": (("page_id", "title", "content"), 1),
+    "delete_confluence_page": (("page_id",), 1),
+}
+# Tools whose single argument is the rest of the message, taken verbatim
+# (JQL and CQL use quotes of their own)
+COMMAND_TEXT_ARG = {
+    "get_jira_tickets": "ticket_ids",
+    "search_jira_tickets": "jql_query",
+    "search_confluence_pages": "query",
+}
+
 def parse_command(text: str):
-    """Parses a command string into a tool name and arguments."""
-    parts = text.strip().split()
-    if len(parts) < 2:
+    """Parses a structured command into a tool name and arguments.
+
+    Returns (None, None) unless the text names a known tool and supplies all of
+    its required arguments, so anything else can go to the LLM.
+    """
+    parts = text.strip().split(None, 1)
+    # Skip the bot's own mention if it's still in the text
+    if parts and parts[0].startswith("<@"):
+        parts = parts[1].split(None, 1) if len(parts) > 1 else []
+    if not parts:
         return None, None # Not a valid command
-    
-    tool_name = parts[1]
-    raw_args = parts[2:]
-    
-    # This is a simple parser. A real implementation would be more robust.
-    # For now, we assume the arguments are in the correct order.
-    arguments = {}
-    if tool_name == "get_jira_ticket":
-        arguments['ticket_id'] = raw_args[0]
-    elif tool_name == "create_jira_ticket":
-        arguments['project_key'] = raw_args[0]
-        arguments['summary'] = raw_args[1]
-        arguments['description'] = raw_args[2]
-        arguments['issue_type'] = raw_args[3]
-    elif tool_name == "search_jira_tickets":
-        arguments['jql_query'] = " ".join(raw_args)
-    elif tool_name == "search_confluence_pages":
-        arguments['query'] = " ".join(raw_args)
-        
-    return tool_name, arguments
-
-def get_tool_call_from_llm(user_message):
-    tool_list = (
-        "get_jira_ticket(ticket_id), "
-        "create_jira_ticket(project_key, summary, description, issue_type), "
-        "update_jira_ticket(ticket_id, summary, description, status, assignee), "
-        "delete_jira_ticket(ticket_id), "
-        "search_jira_tickets(jql_query), "
-        "create_confluence_page(space_key, title, content, parent_page_id), "
-        "get_confluence_page(page_id), "
-        "update_confluence_page(page_id, title, content), "
-        "delete_confluence_page(page_id), "
-        "search_confluence_pages(query)"
-    )
-    
+
+    tool_name = parts[0]
+    rest = parts[1].strip() if len(parts) > 1 else ""
+
+    if tool_name in COMMAND_TEXT_ARG:
+        if not rest:
+            return None, None
+        if tool_name == "get_jira_tickets":
+            return tool_name, {"ticket_ids": rest.replace(",", " ").split()}
+        return tool_name, {COMMAND_TEXT_ARG[tool_name]: rest}
+
+    if tool_name not in COMMAND_ARGS:
+        return None, None
+    names, required = COMMAND_ARGS[tool_name]
+    try:
+        raw_args = shlex.split(rest)
+    except ValueError: # Unbalanced quotes
+        return None, None
+    if not required <= len(raw_args) <= len(names):
+        return None, None
+    return tool_name, dict(zip(names, raw_args))
+
+# The prompt around the user's message never changes, so it is built once
+TOOL_LIST = (
+    "get_jira_ticket(ticket_id), "
+    "get_jira_tickets(ticket_ids), "
+    "create_jira_ticket(project_key, summary, description, issue_type), "
+    "update_jira_ticket(ticket_id, summary, description, status, assignee), "
+    "delete_jira_ticket(ticket_id), "
+    "search_jira_tickets(jql_query), "
+    "create_confluence_page(space_key, title, content, parent_page_id), "
+    "get_confluence_page(page_id), "
+    "update_confluence_page(page_id, title, content), "
+    "delete_confluence_page(page_id), "
+    "search_confluence_pages(query), "
+    "batch_execute(operations, max_concurrent, stop_on_error)"
+)
+
+_PROMPT_PREFIX = (
+    f"You are an assistant that helps users interact with Jira and Confluence. "
+    f"Available tools:\n{TOOL_LIST}\n\n"
+)
+
+_PROMPT_SUFFIX = (
+    f"Based on the user's request, determine which tool to call and extract the arguments. "
+    f"Respond ONLY with a valid JSON object in this exact format:\n"
+    f"{{\"tool\": \"tool_name\", \"arguments\": {{...}}}}\n\n"
+    f"Examples:\n"
+    f"- For searching tickets: {{\"tool\": \"search_jira_tickets\", \"arguments\": {{\"jql_query\": \"created >= -2d\"}}}}\n"
+    f"- For requests that need several operations: {{\"tool\": \"batch_execute\", \"arguments\": {{\"operations\": [{{\"tool\": \"create_confluence_page\", \"arguments\": {{\"space_key\": \"TEAM\", \"title\": \"Release notes\", \"content\": \"Notes\"}}}}, {{\"tool\": \"update_jira_ticket\", \"arguments\": {{\"ticket_id\": \"PROJ-123\", \"status\": \"Done\"}}}}]}}}}\n\n"
+    f"Respond with ONLY the JSON object, no other text:"
+)
+
+# How long the LLM may take before the user gets a "thinking" note
+THINKING_DELAY = 0.2
+
+# Matches requests for the help text; compiled once at import
+_HELP_RE = re.compile(r"\b(list|tools|available|help|what can you do)\b", re.IGNORECASE)
+
+# Routing decisions from the LLM, keyed by a hash of the (whitespace
+# normalized) message, so repeated requests skip a generation entirely.
+# Entries close to expiry are refreshed in the background. Case is kept in the
+# key because the extracted arguments (summaries, titles) depend on it.
+LLM_CACHE_TTL = 900
+_LLM_REFRESH_WINDOW = 60
+_LLM_CACHE = TTLCache(maxsize=2048, ttl=LLM_CACHE_TTL)
+# LLM requests in flight, so identical concurrent messages share one request
+_LLM_INFLIGHT = {}
+
+def _llm_cache_key(user_message: str) -> bytes:
+    return hashlib.blake2b(" ".join(user_message.split()).encode(), digest_size=16).digest()
+
+async def _ask_llm_and_cache(key: bytes, user_message: str):
+    tool_call = await _ask_llm(user_message)
+    if tool_call is not None:
+        _LLM_CACHE[key] = (tool_call, time.monotonic())
+    return tool_call
+
+def _route(key: bytes, user_message: str) -> asyncio.Task:
+    """Starts the LLM request for a message, or joins the one already running."""
+    task = _LLM_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_ask_llm_and_cache(key, user_message))
+        _LLM_INFLIGHT[key] = task
+
+        def done(task):
+            _LLM_INFLIGHT.pop(key, None)
+            # Background refreshes have no caller to see a failure
+            if not task.cancelled() and task.exception() is not None:
+                log.warning("LLM request failed: %s", task.exception())
+
+        task.add_done_callback(done)
+    return task
+
+async def get_tool_call_from_llm(user_message):
     # Check if user is asking about available tools
-    if any(keyword in user_message.lower() for keyword in ["list", "tools", "available", "what can you do", "help"]):
+    if _HELP_RE.search(user_message):
         return {
             "tool": "list_available_tools",
             "arguments": {}
         }
-    
-    prompt = (
-        f"You are an assistant that helps users interact with Jira and Confluence. "
-        f"Available tools:\n{tool_list}\n\n"
-        f"User message: '{user_message}'\n\n"
-        f"Based on the user's request, determine which tool to call and extract the arguments. "
-        f"Respond ONLY with a valid JSON object in this exact format:\n"
-        f"{{\"tool\": \"tool_name\", \"arguments\": {{...}}}}\n\n"
-        f"Examples:\n"
-        f"- For creating a ticket: {{\"tool\": \"create_jira_ticket\", \"arguments\": {{\"project_key\": \"PROJ\", \"summary\": \"Bug title\", \"description\": \"Bug description\", \"issue_type\": \"Bug\"}}}}\n"
-        f"- For updating a ticket: {{\"tool\": \"update_jira_ticket\", \"arguments\": {{\"ticket_id\": \"PROJ-123\", \"status\": \"In Progress\", \"assignee\": \"john.doe\"}}}}\n"
-        f"- For deleting a ticket: {{\"tool\": \"delete_jira_ticket\", \"arguments\": {{\"ticket_id\": \"PROJ-123\"}}}}\n"
-        f"- For searching tickets: {{\"tool\": \"search_jira_tickets\", \"arguments\": {{\"jql_query\": \"created >= -2d\"}}}}\n"
-        f"- For getting a ticket: {{\"tool\": \"get_jira_ticket\", \"arguments\": {{\"ticket_id\": \"PROJ-123\"}}}}\n"
-        f"- For creating a Confluence page: {{\"tool\": \"create_confluence_page\", \"arguments\": {{\"space_key\": \"TEAM\", \"title\": \"Page Title\", \"content\": \"Page content here\"}}}}\n"
-        f"- For updating a Confluence page: {{\"tool\": \"update_confluence_page\", \"arguments\": {{\"page_id\": \"12345\", \"title\": \"New Title\", \"content\": \"Updated content\"}}}}\n"
-        f"- For searching Confluence: {{\"tool\": \"search_confluence_pages\", \"arguments\": {{\"query\": \"API documentation\"}}}}\n\n"
-        f"Respond with ONLY the JSON object, no other text:"
-    )
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={"model": "llama3.2", "prompt": prompt, "stream": False}
-    )
-    match = re.search(r'\{.*\}', response.json()["response"], re.DOTALL)
-    if match:
+
+    key = _llm_cache_key(user_message)
+    cached = _LLM_CACHE.get(key)
+    if cached is not None:
+        tool_call, stored_at = cached
+        if time.monotonic() - stored_at > LLM_CACHE_TTL - _LLM_REFRESH_WINDOW:
+            _route(key, user_message)
+        return tool_call
+    return await _route(key, user_message)
+
+class _JsonObjectScanner:
+    """Finds the first complete top-level {...} in text that arrives in pieces."""
+
+    def __init__(self):
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, piece: str):
+        """Consumes more text; returns the object's text once its closing brace arrives."""
+        for char in piece:
+            if self._depth == 0 and char != "{":
+                continue # Text before the object
+            self._parts.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    return "".join(self._parts)
+        return None
+
+def _generate_json(prompt: str):
+    """Streams a generation from Ollama and returns the first JSON object in it.
+
+    The stream is closed as soon as the object is complete, which stops the
+    model instead of waiting for it to finish whatever it adds afterwards.
+    """
+    scanner = _JsonObjectScanner()
+    with OLLAMA_SESSION.post(
+        OLLAMA_GENERATE_URL,
+        # JSON mode constrains decoding to a valid object; temperature 0 makes
+        # replies repeatable, which keeps the routing cache useful
+        json={"model": "llama3.2", "prompt": prompt, "stream": True, "format": "json", "options": {"temperature": 0}},
+        stream=True,
+        timeout=OLLAMA_TIMEOUT
+    ) as response:
+        # An error such as an unknown model is a failure, not an empty reply
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = orjson.loads(line)
+            piece = chunk.get("response", "")
+            found = scanner.feed(piece)
+            if found is not None:
+                return found
+            if chunk.get("done"):
+                break
+    # The reply never closed an object, so there is nothing to parse
+    return None
+
+async def _ask_llm(user_message):
+    prompt = f"{_PROMPT_PREFIX}User message: '{user_message}'\n\n{_PROMPT_SUFFIX}"
+    async with LLM_BREAKER.guard(), LLM_LIMITER.slot():
+        json_text = await asyncio.to_thread(_generate_json, prompt)
+    if json_text:
         try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            print(f"Failed to parse JSON from LLM response: {response.json()['response']}")
+            return orjson.loads(json_text)
+        except orjson.JSONDecodeError:
+            log.warning("Failed to parse JSON from LLM response: %s", json_text)
             return None
     return None
 
-def format_tool_response(tool_name: str, result_data: dict) -> str:
-    """Format tool responses in a user-friendly way."""
-    
-    if not result_data.get("success", False):
-        error_msg = result_data.get("error", "Unknown error occurred")
-        return f"❌ **Error in {tool_name}:** {error_msg}"
-    
-    if tool_name == "get_jira_ticket":
-        ticket_id = result_data.get("ticket_id", "Unknown")
-        summary = result_data.get("summary", "No summary")
-        status = result_data.get("status", "Unknown")
-        assignee = result_data.get("assignee", "Unassigned")
-        url = result_data.get("url", "")
-        
-        return f"""✅ **Jira Ticket: {ticket_id}**
-        
+# --- 3b. Response Formatting ---
+# One formatter per tool, looked up in FORMATTERS. Single-item results are
+# rendered from templates; missing fields fall back to the defaults given.
+_TMPL_GET_JIRA = """✅ **Jira Ticket: {ticket_id}**
+
 📋 **Summary:** {summary}
 📊 **Status:** {status}
 👤 **Assignee:** {assignee}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "create_jira_ticket":
-        ticket_id = result_data.get("ticket_id", "Unknown")
-        summary = result_data.get("summary", "No summary")
-        url = result_data.get("url", "")
-        
-        return f"""✅ **Ticket Created Successfully!**
-        
+
+_TMPL_CREATE_JIRA = """✅ **Ticket Created Successfully!**
+
 🎫 **Ticket ID:** {ticket_id}
 📋 **Summary:** {summary}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "search_jira_tickets":
-        tickets = result_data.get("tickets", [])
-        if not tickets:
-            return "🔍 **Search Results:** No tickets found matching your criteria."
-        
-        response = f"🔍 **Found {len(tickets)} ticket(s):**\n\n"
-        for i, ticket in enumerate(tickets, 1):
-            ticket_id = ticket.get("ticket_id", "Unknown")
-            summary = ticket.get("summary", "No summary")
-            status = ticket.get("status", "Unknown")
-            url = ticket.get("url", "")
-            
-            response += f"{i}. **{ticket_id}** - {summary}\n"
-            response += f"   📊 Status: {status}\n"
-            response += f"   🔗 {url}\n\n"
-        
-        return response
-    
-    elif tool_name == "search_confluence_pages":
-        pages = result_data.get("pages", [])
-        if not pages:
-            return "🔍 **Search Results:** No Confluence pages found matching your criteria."
-        
-        response = f"🔍 **Found {len(pages)} Confluence page(s):**\n\n"
-        for i, page in enumerate(pages, 1):
-            title = page.get("title", "Untitled")
-            snippet = page.get("snippet", "No description available")
-            url = page.get("url", "")
-            
-            # Truncate snippet if too long
-            if len(snippet) > 150:
-                snippet = snippet[:147] + "..."
-            
-            response += f"{i}. **{title}**\n"
-            response += f"   📝 {snippet}\n"
-            response += f"   🔗 {url}\n\n"
-        
-        return response
-    
-    elif tool_name == "update_jira_ticket":
-        ticket_id = result_data.get("ticket_id", "Unknown")
-        message = result_data.get("message", "Update completed")
-        url = result_data.get("url", "")
-        
-        return f"""✅ **Ticket Updated Successfully!**
-        
+
+_TMPL_UPDATE_JIRA = """✅ **Ticket Updated Successfully!**
+
 🎫 **Ticket ID:** {ticket_id}
 📝 **Message:** {message}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "delete_jira_ticket":
-        ticket_id = result_data.get("ticket_id", "Unknown")
-        message = result_data.get("message", "Deletion completed")
-        url = result_data.get("url", "")
-        
-        return f"""🗑️ **Ticket Deleted Successfully!**
-        
+
+_TMPL_DELETE_JIRA = """🗑️ **Ticket Deleted Successfully!**
+
 🎫 **Ticket ID:** {ticket_id}
 📝 **Message:** {message}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "create_confluence_page":
-        page_id = result_data.get("page_id", "Unknown")
-        title = result_data.get("title", "Untitled")
-        url = result_data.get("url", "")
-        
-        return f"""✅ **Confluence Page Created Successfully!**
-        
+
+_TMPL_CREATE_PAGE = """✅ **Confluence Page Created Successfully!**
+
 📄 **Page ID:** {page_id}
 📋 **Title:** {title}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "get_confluence_page":
-        page_id = result_data.get("page_id", "Unknown")
-        title = result_data.get("title", "Untitled")
-        content = result_data.get("content", "No content available")
-        url = result_data.get("url", "")
-        
-        # Truncate content if too long
-        if len(content) > 300:
-            content = content[:297] + "..."
-        
-        return f"""📄 **Confluence Page: {page_id}**
-        
+
+_TMPL_GET_PAGE = """📄 **Confluence Page: {page_id}**
+
 📋 **Title:** {title}
 📝 **Content:** {content}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "update_confluence_page":
-        page_id = result_data.get("page_id", "Unknown")
-        message = result_data.get("message", "Update completed")
-        url = result_data.get("url", "")
-        
-        return f"""✅ **Confluence Page Updated Successfully!**
-        
+
+_TMPL_UPDATE_PAGE = """✅ **Confluence Page Updated Successfully!**
+
 📄 **Page ID:** {page_id}
 📝 **Message:** {message}
 🔗 **URL:** {url}"""
-    
-    elif tool_name == "delete_confluence_page":
-        page_id = result_data.get("page_id", "Unknown")
-        message = result_data.get("message", "Deletion completed")
-        url = result_data.get("url", "")
-        
-        return f"""🗑️ **Confluence Page Deleted Successfully!**
-        
+
+_TMPL_DELETE_PAGE = """🗑️ **Confluence Page Deleted Successfully!**
+
 📄 **Page ID:** {page_id}
 📝 **Message:** {message}
 🔗 **URL:** {url}"""
+
+_TICKET_DEFAULTS = {"ticket_id": "Unknown", "summary": "No summary", "status": "Unknown", "assignee": "Unassigned", "url": ""}
+_PAGE_DEFAULTS = {"page_id": "Unknown", "title": "Untitled", "url": ""}
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+def _template(template: str, defaults: dict):
+    """Builds a formatter that fills a template from the result, falling back to defaults."""
+    return lambda result_data: template.format_map({**defaults, **result_data})
+
+def _fmt_get_jira_tickets(result_data: dict) -> str:
+    tickets = result_data.get("tickets", [])
+    response = f"🎫 **Fetched {len(tickets)} ticket(s):**\n\n"
+    for i, ticket in enumerate(tickets, 1):
+        if not ticket.get("success", False):
+            response += f"{i}. ❌ {ticket.get('error', 'Unknown error occurred')}\n\n"
+            continue
+        ticket = {**_TICKET_DEFAULTS, **ticket}
+        response += f"{i}. **{ticket['ticket_id']}** - {ticket['summary']}\n"
+        response += f"   📊 Status: {ticket['status']}\n"
+        response += f"   👤 Assignee: {ticket['assignee']}\n"
+        response += f"   🔗 {ticket['url']}\n\n"
+    return response
+
+def _fmt_search_jira_tickets(result_data: dict) -> str:
+    tickets = result_data.get("tickets", [])
+    if not tickets:
+        return "🔍 **Search Results:** No tickets found matching your criteria."
+    response = f"🔍 **Found {len(tickets)} ticket(s):**\n\n"
+    for i, ticket in enumerate(tickets, 1):
+        ticket = {**_TICKET_DEFAULTS, **ticket}
+        response += f"{i}. **{ticket['ticket_id']}** - {ticket['summary']}\n"
+        response += f"   📊 Status: {ticket['status']}\n"
+        response += f"   🔗 {ticket['url']}\n\n"
+    return response
+
+def _fmt_search_confluence_pages(result_data: dict) -> str:
+    pages = result_data.get("pages", [])
+    if not pages:
+        return "🔍 **Search Results:** No Confluence pages found matching your criteria."
+    response = f"🔍 **Found {len(pages)} Confluence page(s):**\n\n"
+    for i, page in enumerate(pages, 1):
+        snippet = _truncate(page.get("snippet", "No description available"), 150)
+        response += f"{i}. **{page.get('title', 'Untitled')}**\n"
+        response += f"   📝 {snippet}\n"
+        response += f"   🔗 {page.get('url', '')}\n\n"
+    return response
+
+def _fmt_get_confluence_page(result_data: dict) -> str:
+    values = {**_PAGE_DEFAULTS, "content": "No content available", **result_data}
+    values["content"] = _truncate(values["content"], 300)
+    return _TMPL_GET_PAGE.format_map(values)
+
+def _fmt_batch_execute(result_data: dict) -> str:
+    results = result_data.get("results", [])
+    response = f"📦 **Ran {len(results)} operation(s):**\n\n"
+    for entry in results:
+        response += format_tool_response(entry.get("tool") or "unknown tool", entry.get("result", {})) + "\n\n"
+    return response
+
+FORMATTERS = {
+    "get_jira_ticket": _template(_TMPL_GET_JIRA, _TICKET_DEFAULTS),
+    "get_jira_tickets": _fmt_get_jira_tickets,
+    "create_jira_ticket": _template(_TMPL_CREATE_JIRA, _TICKET_DEFAULTS),
+    "search_jira_tickets": _fmt_search_jira_tickets,
+    "search_confluence_pages": _fmt_search_confluence_pages,
+    "update_jira_ticket": _template(_TMPL_UPDATE_JIRA, {**_TICKET_DEFAULTS, "message": "Update completed"}),
+    "delete_jira_ticket": _template(_TMPL_DELETE_JIRA, {**_TICKET_DEFAULTS, "message": "Deletion completed"}),
+    "create_confluence_page": _template(_TMPL_CREATE_PAGE, _PAGE_DEFAULTS),
+    "get_confluence_page": _fmt_get_confluence_page,
+    "update_confluence_page": _template(_TMPL_UPDATE_PAGE, {**_PAGE_DEFAULTS, "message": "Update completed"}),
+    "delete_confluence_page": _template(_TMPL_DELETE_PAGE, {**_PAGE_DEFAULTS, "message": "Deletion completed"}),
+    "batch_execute": _fmt_batch_execute,
+}
+
+def format_tool_response(tool_name: str, result_data: dict) -> str:
+    """Format tool responses in a user-friendly way."""
     
-    else:
+    if not result_data.get("success", False):
+        error_msg = result_data.get("error", "Unknown error occurred")
+        return f"❌ **Error in {tool_name}:** {error_msg}"
+
+    formatter = FORMATTERS.get(tool_name)
+    if formatter is None:
         # Fallback for unknown tools
-        return f"✅ **{tool_name} completed successfully:**\n```{json.dumps(result_data, indent=2)}```"
+        return f"✅ **{tool_name} completed successfully:**\n```{orjson.dumps(result_data, option=orjson.OPT_INDENT_2).decode()}```"
+    return formatter(result_data)
 
 # --- 4. Main Slack Event Handler ---
 @app.event("app_mention")
@@ -266,15 +633,33 @@ async def handle_app_mention(event, say):
     message_text = event["text"].replace(f"<@{event['user']}>", "").strip()
     channel_id = event["channel"]
     
-    print(f"Received mention: '{message_text}' in channel {channel_id}")
+    log.debug("Received mention: %r in channel %s", message_text, channel_id)
 
-    tool_call = get_tool_call_from_llm(message_text)
-    if tool_call and "tool" in tool_call and "arguments" in tool_call:
-        tool_name = tool_call["tool"]
-        arguments = tool_call["arguments"]
-    else:
-        await say(text="Sorry, I didn't understand that command. Please use the format: `<tool_name> <arguments...>`")
-        return
+    # Structured commands ("get_jira_ticket PROJ-123") skip the LLM entirely
+    tool_name, arguments = parse_command(message_text)
+    if tool_name is None:
+        llm_task = asyncio.create_task(get_tool_call_from_llm(message_text))
+        try:
+            try:
+                tool_call = await asyncio.wait_for(asyncio.shield(llm_task), THINKING_DELAY)
+            except asyncio.TimeoutError:
+                # Let the user know something is happening while the model runs
+                await say(text="🤔 Thinking...")
+                tool_call = await llm_task
+        except CircuitOpenError as e:
+            await say(text=f"⚠️ {e}")
+            return
+        except Exception:
+            # Ollama is down or stalled; the breaker opens after enough of these
+            log.exception("LLM request failed")
+            await say(text=f"⚠️ {LLM_BREAKER.service} is unavailable right now; please try again shortly.")
+            return
+        if tool_call and "tool" in tool_call and "arguments" in tool_call:
+            tool_name = tool_call["tool"]
+            arguments = tool_call["arguments"]
+        else:
+            await say(text="Sorry, I didn't understand that command. Please use the format: `<tool_name> <arguments...>`")
+            return
 
     # Handle special case for listing available tools
     if tool_name == "list_available_tools":
@@ -283,6 +668,7 @@ async def handle_app_mention(event, say):
 
 **Jira Tools:**
 • `get_jira_ticket(ticket_id)` - Get details of a specific Jira ticket
+• `get_jira_tickets(ticket_ids)` - Get details of several Jira tickets at once
 • `create_jira_ticket(project_key, summary, description, issue_type)` - Create a new Jira ticket
 • `update_jira_ticket(ticket_id, summary, description, status, assignee)` - Update an existing Jira ticket
 • `delete_jira_ticket(ticket_id)` - Delete a Jira ticket
@@ -295,8 +681,12 @@ async def handle_app_mention(event, say):
 • `delete_confluence_page(page_id)` - Delete a Confluence page
 • `search_confluence_pages(query)` - Search Confluence pages
 
+**Batching:**
+• `batch_execute(operations, max_concurrent, stop_on_error)` - Run several of the tools above in one request
+
 **Examples:**
 • "Get ticket PROJ-123" → `get_jira_ticket`
+• "Get tickets PROJ-123 and PROJ-124" → `get_jira_tickets`
 • "Create a bug ticket for login issues" → `create_jira_ticket`
 • "Update ticket PROJ-123 status to In Progress" → `update_jira_ticket`
 • "Delete ticket PROJ-123" → `delete_jira_ticket`
@@ -304,6 +694,7 @@ async def handle_app_mention(event, say):
 • "Create a new Confluence page about API docs" → `create_confluence_page`
 • "Update Confluence page 12345 with new content" → `update_confluence_page`
 • "Find API documentation" → `search_confluence_pages`
+• "Create a release notes page and close PROJ-123" → `batch_execute`
 """
         await say(text=tools_info)
         return
@@ -311,53 +702,16 @@ async def handle_app_mention(event, say):
     await say(text=f"Got it! Calling tool `{tool_name}` with arguments: `{arguments}`. Please wait...")
 
     try:
-        # --- MCP Client Logic ---
-        # 1 & 2. Launch the MCP server and connect the client in one step using StdioServerParameters
-        python_executable = sys.executable
-        main_py_path = os.path.abspath("main.py")
-        params = StdioServerParameters(command=main_py_path)
-        async with stdio_client(params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                # 3. Call the tool
-                response = await session.call_tool(name=tool_name, arguments=arguments)
-                # 4. Format and send the response
-                # The response from our server is a TextContent object containing a string
-                content_block = response.content[0] if response.content else None
-                result_text = None
-                if content_block is not None:
-                    if isinstance(content_block, TextContent):
-                        result_text = content_block.text
-                    elif getattr(content_block, 'type', None) == 'image':
-                        result_text = '[Image content received]'
-                    elif getattr(content_block, 'type', None) == 'audio':
-                        result_text = '[Audio content received]'
-                    elif getattr(content_block, 'type', None) == 'resource':
-                        result_text = '[Embedded resource received]'
-                    else:
-                        result_text = str(content_block)
-                else:
-                    result_text = '[No content returned from tool]'
-                # Debug print for result_text
-                print(f"[DEBUG] result_text before JSON parsing: {result_text}")
-                # Try to parse the string as JSON for pretty formatting
-                try:
-                    result_data = json.loads(result_text)
-                    formatted_response = format_tool_response(tool_name, result_data)
-                    await say(text=formatted_response)
-                except json.JSONDecodeError as e:
-                    print(f"[DEBUG] JSONDecodeError: {e}")
-                    # Try ast.literal_eval as fallback
-                    try:
-                        result_data = ast.literal_eval(result_text)
-                        formatted_response = format_tool_response(tool_name, result_data)
-                        await say(text=formatted_response)
-                    except Exception as ast_e:
-                        print(f"[DEBUG] ast.literal_eval error: {ast_e}")
-                        await say(text=f"Tool `{tool_name}` finished with result:\n{result_text}")
+        result_data, result_text = await run_tool(tool_name, arguments)
+        if result_data is not None:
+            await say(text=format_tool_response(tool_name, result_data))
+        else:
+            await say(text=f"Tool `{tool_name}` finished with result:\n{result_text}")
 
+    except CircuitOpenError as e:
+        await say(text=f"⚠️ {e}")
     except Exception as e:
-        print(f"An error occurred: {e}")
+        log.exception("Tool call %s failed", tool_name)
         await say(text=f"An error occurred while running the tool: {e}")
 
 
@@ -366,11 +720,35 @@ async def main():
     print("Starting Slack Bot...")
     # The SocketModeHandler connects to Slack and listens for events.
     handler = AsyncSocketModeHandler(app, SLACK_APP_TOKEN)
-    await handler.start_async()
+    if MCP_INPROC:
+        # In-process tools run through asyncio.to_thread, so give this loop the
+        # same POOL_MAXSIZE worker pool the stdio server would use.
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=POOL_MAXSIZE, thread_name_prefix="atlassian-tool")
+        )
+    try:
+        # Start the MCP server up front so the first mention doesn't wait for it
+        if not MCP_INPROC:
+            try:
+                await MCP_SERVER.session()
+            except Exception as e:
+                log.warning("Could not start the MCP server yet, will retry on first use: %s", e)
+        await handler.start_async()
+    finally:
+        await handler.close_async()
+        await MCP_SERVER.close()
+        OLLAMA_SESSION.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG if os.getenv("MCP_DEBUG") == "1" else logging.WARNING)
     # Ensure you have the necessary tokens in your .env file
     if not all([SLACK_BOT_TOKEN, SLACK_APP_TOKEN]):
         print("!!! ERROR: SLACK_BOT_TOKEN and SLACK_APP_TOKEN must be set in your .env file.")
     else:
-        asyncio.run(main()) 
\ No newline at end of file
+        # Run on uvloop when it's installed, otherwise the default loop
+        try:
+            import uvloop
+        except ImportError:
+            asyncio.run(main())
+        else:
+            uvloop.run(main()) 
\ No newline at end of file